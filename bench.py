@@ -0,0 +1,544 @@
+import argparse
+import asyncio
+import collections
+import datetime
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+import discord
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_ids = itertools.count(1_000_000_000)
+API_LATENCY = 0.0
+
+
+async def api_call():
+    await asyncio.sleep(API_LATENCY * random.uniform(0.5, 1.5))
+
+
+class StubResponse:
+    def __init__(self, status):
+        self.status = status
+        self.reason = "stub"
+
+
+class StubRole:
+    def __init__(self, role_id, name="role"):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+
+
+class StubAvatar:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class StubMember(discord.Member):
+    id = None
+    roles = None
+    mention = None
+    name = None
+    display_name = None
+    display_avatar = None
+    guild = None
+
+    def __init__(self, guild, roles=()):
+        self.id = next(_ids)
+        self.guild = guild
+        self.roles = list(roles)
+        self.mention = f"<@{self.id}>"
+        self.name = self.display_name = f"player{self.id}"
+        self.display_avatar = StubAvatar()
+
+    async def edit(self, **kwargs):
+        await api_call()
+        if "roles" in kwargs:
+            self.roles = list(kwargs["roles"])
+
+    async def add_roles(self, *roles, **kwargs):
+        await api_call()
+        self.roles.extend(roles)
+
+    async def remove_roles(self, *roles, **kwargs):
+        await api_call()
+        self.roles = [role for role in self.roles if role not in roles]
+
+
+class StubMessage:
+    def __init__(self, channel, content=None, embed=None, view=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.embeds = [embed] if embed else []
+        self.view = view
+
+    async def edit(self, **kwargs):
+        await api_call()
+        if "embed" in kwargs:
+            self.embeds = [kwargs["embed"]]
+        if "view" in kwargs:
+            self.view = kwargs["view"]
+
+
+class StubThread(discord.Thread):
+    id = None
+    name = None
+    guild = None
+    mention = None
+    parent_id = None
+
+    def __init__(self, guild, name, parent_id=None):
+        self.id = next(_ids)
+        self.name = name
+        self.guild = guild
+        self.mention = f"<#{self.id}>"
+        self.parent_id = parent_id
+        self.member_ids = set()
+        self.messages = []
+
+    async def add_user(self, user):
+        await api_call()
+        self.member_ids.add(user.id)
+
+    async def remove_user(self, user):
+        await api_call()
+        self.member_ids.discard(user.id)
+
+    async def send(self, content=None, **kwargs):
+        await api_call()
+        message = StubMessage(self, content, kwargs.get("embed"))
+        self.messages.append(message)
+        return message
+
+    async def delete(self, **kwargs):
+        await api_call()
+        self.guild.threads.pop(self.id, None)
+
+
+class StubTextChannel:
+    def __init__(self, guild, channel_id=None):
+        self.id = channel_id or next(_ids)
+        self.guild = guild
+        self.mention = f"<#{self.id}>"
+        self.messages = {}
+
+    async def send(self, content=None, **kwargs):
+        await api_call()
+        message = StubMessage(self, content, kwargs.get("embed"), kwargs.get("view"))
+        self.messages[message.id] = message
+        return message
+
+    async def fetch_message(self, message_id):
+        await api_call()
+        if message_id not in self.messages:
+            raise discord.NotFound(StubResponse(404), "Unknown Message")
+        return self.messages[message_id]
+
+    def get_partial_message(self, message_id):
+        return self.messages.get(message_id) or StubMessage(self)
+
+    async def create_thread(self, name, **kwargs):
+        await api_call()
+        thread = StubThread(self.guild, name, parent_id=self.id)
+        self.guild.threads[thread.id] = thread
+        return thread
+
+
+class StubGuild:
+    def __init__(self):
+        self.id = next(_ids)
+        self.channels = {}
+        self.threads = {}
+        self.roles = {}
+        self.members = {}
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_thread(self, thread_id):
+        return self.threads.get(thread_id)
+
+    async def fetch_channel(self, channel_id):
+        await api_call()
+        channel = self.channels.get(channel_id) or self.threads.get(channel_id)
+        if channel is None:
+            raise discord.NotFound(StubResponse(404), "Unknown Channel")
+        return channel
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+    def get_member(self, member_id):
+        return self.members.get(member_id)
+
+
+class StubInteractionResponse:
+    def __init__(self):
+        self.done = False
+
+    async def defer(self, **kwargs):
+        await api_call()
+        self.done = True
+
+    async def send_message(self, content=None, **kwargs):
+        await api_call()
+        self.done = True
+
+    def is_done(self):
+        return self.done
+
+
+class StubFollowup:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content=None, **kwargs):
+        await api_call()
+        self.messages.append((content, kwargs))
+
+
+class StubInteraction(discord.Interaction):
+    user = None
+    guild = None
+    channel = None
+    channel_id = None
+    message = None
+    response = None
+    followup = None
+    created_at = None
+    extras = None
+    command = None
+
+    def __init__(self, user, guild, channel=None, message=None):
+        self.user = user
+        self.guild = guild
+        self.channel = channel
+        self.channel_id = channel.id if channel else None
+        self.message = message
+        self.response = StubInteractionResponse()
+        self.followup = StubFollowup()
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.extras = {}
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.samples = collections.defaultdict(list)
+
+    async def measure(self, name, coro):
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.samples[name].append(time.perf_counter() - started)
+
+    @staticmethod
+    def percentile(samples, pct):
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def report(self, elapsed):
+        print(f"{'handler':<16}{'calls':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        for name, samples in self.samples.items():
+            print(
+                f"{name:<16}{len(samples):>8}"
+                f"{self.percentile(samples, 50) * 1000:>10.1f}{self.percentile(samples, 99) * 1000:>10.1f}"
+                f"{max(samples) * 1000:>10.1f}"
+            )
+        total = sum(len(samples) for samples in self.samples.values())
+        print(f"throughput: {total} handler calls in {elapsed:.2f}s ({total / elapsed:.0f}/s)")
+
+
+class Workload:
+    def __init__(self, indexg, args):
+        self.indexg = indexg
+        self.args = args
+        self.guild = StubGuild()
+        self.announcements = StubTextChannel(self.guild, indexg.ANNOUNCEMENT_CHANNEL_ID)
+        self.guild.channels[self.announcements.id] = self.announcements
+        self.host_role = StubRole(indexg.LEAGUE_HOST_ROLE_ID, "League Host")
+        self.recorder = LatencyRecorder()
+        self.league_ids = []
+        self.hosts = {}
+        self.players = {}
+        indexg.bot.get_channel = self.guild.get_channel
+
+    async def host_leagues(self):
+        await asyncio.gather(*(self.host_league() for _ in range(self.args.leagues)))
+
+    async def host_league(self, match_type=None):
+        host = StubMember(self.guild, roles=[self.host_role])
+        league_id = self.indexg.generate_league_id()
+        announcement = await self.announcements.send(view=self.indexg.JoinButtonView(league_id, None))
+        thread = await self.announcements.create_thread(name=f"League {league_id}")
+        await self.indexg.league_store.put(league_id, {
+            "host": host.id,
+            "players": [host.id],
+            "region": random.choice(self.indexg.REGION_CHOICES),
+            "game_mode": random.choice(self.indexg.GAMEMODE_CHOICES),
+            "match_type": match_type or random.choice(self.indexg.MATCHTYPE_CHOICES),
+            "perks": random.choice(self.indexg.PERKS_CHOICES),
+            "private_link": None,
+            "announcement_msg_id": announcement.id,
+            "announcement_channel_id": self.announcements.id,
+            "thread_id": thread.id,
+            "thread_msg_id": None,
+            "rank_required_id": None,
+        })
+        self.league_ids.append(league_id)
+        self.hosts[league_id] = host
+        return league_id
+
+    async def click_join(self, league_id, member, delay=0.0):
+        await asyncio.sleep(delay)
+        interaction = StubInteraction(member, self.guild, self.announcements)
+        await self.recorder.measure("join", self.indexg.JoinButton(league_id).callback(interaction))
+        if any("joined League" in (content or "") for content, _ in interaction.followup.messages):
+            self.players.setdefault(league_id, []).append(member)
+            return True
+        return False
+
+    async def join_clicks(self):
+        members = [StubMember(self.guild) for _ in range(max(1, self.args.joins // 4))]
+        await asyncio.gather(*(
+            self.click_join(random.choice(self.league_ids), random.choice(members), random.uniform(0, self.args.ramp))
+            for _ in range(self.args.joins)
+        ))
+
+    async def join_burst(self):
+        league_id = await self.host_league(self.indexg.MATCHTYPE_CHOICES[0])
+        members = [StubMember(self.guild) for _ in range(self.args.burst)]
+        await self.indexg.db.flush()
+        stats_before = collections.Counter(self.indexg.db.stats)
+        self.indexg.loop_lag.max_lag = 0.0
+        joined = await asyncio.gather(*(self.click_join(league_id, member) for member in members))
+        await self.indexg.db.flush()
+        written = collections.Counter(self.indexg.db.stats)
+        written.subtract(stats_before)
+
+        league = self.indexg.league_store.get(league_id)
+        capacity = self.indexg.get_players_required(league["match_type"])
+        accepted = sum(joined)
+        assert len(league["players"]) == len(set(league["players"])), "duplicate players after burst"
+        assert len(league["players"]) == min(capacity, 1 + len(members)), f"league not filled exactly: {len(league['players'])}/{capacity}"
+        assert accepted == min(capacity - 1, len(members)), f"{accepted} burst clicks accepted for {capacity - 1} open slots"
+        assert written["mutations"] >= accepted and written["writes_issued"], "burst did not go through the storage write path"
+        return (
+            f"{accepted}/{len(members)} clicks accepted into empty league {league_id} ({capacity} slots incl. host), "
+            f"{written['mutations']} mutations in {written['writes_issued']} writes"
+        )
+
+    async def churn(self):
+        actions = []
+        for _ in range(self.args.churn):
+            joined = [(lid, members) for lid, members in self.players.items() if members]
+            if not joined:
+                break
+            league_id, members = random.choice(joined)
+            member = members.pop(random.randrange(len(members)))
+            thread = self.guild.get_thread(self.indexg.league_store.get(league_id)["thread_id"])
+            if random.random() < 0.5:
+                interaction = StubInteraction(self.hosts[league_id], self.guild, thread)
+                actions.append(self.recorder.measure("kick-member", self.leagues.kick_member.callback(interaction, member, None)))
+            else:
+                interaction = StubInteraction(member, self.guild, thread)
+                actions.append(self.recorder.measure("leave-league", self.leagues.leave_league.callback(interaction, None)))
+        await asyncio.gather(*actions)
+
+    async def balanced_teams(self):
+        full = []
+        for league_id in self.league_ids:
+            league = self.indexg.league_store.get(league_id)
+            if league["match_type"] != "1v1" and len(league["players"]) >= self.indexg.get_players_required(league["match_type"]):
+                full.append(league_id)
+
+        overflow_id = self.indexg.generate_league_id()
+        overflow_host = StubMember(self.guild, roles=[self.host_role])
+        substitutes = [StubMember(self.guild) for _ in range(4)]
+        await self.indexg.league_store.put(overflow_id, {
+            **self.indexg.league_store.get(self.league_ids[0]),
+            "host": overflow_host.id,
+            "match_type": "4v4",
+            "players": [overflow_host.id] + [StubMember(self.guild).id for _ in range(7)] + [member.id for member in substitutes],
+            "thread_id": (await self.announcements.create_thread(name=f"League {overflow_id}")).id,
+        })
+        self.league_ids.append(overflow_id)
+        self.hosts[overflow_id] = overflow_host
+        full.append(overflow_id)
+
+        interactions = {}
+        for league_id in full:
+            thread = self.guild.get_thread(self.indexg.league_store.get(league_id)["thread_id"])
+            interactions[league_id] = StubInteraction(self.hosts[league_id], self.guild, thread)
+        await asyncio.gather(*(
+            self.recorder.measure("randomize-teams", self.leagues.randomize_teams.callback(interaction, None, "balanced"))
+            for interaction in interactions.values()
+        ))
+
+        thread = self.guild.get_thread(self.indexg.league_store.get(overflow_id)["thread_id"])
+        embed = thread.messages[-1].embeds[0]
+        listed = next(field.value for field in embed.fields if field.name == "Substitutes")
+        assert listed.split("\n") == [member.mention for member in substitutes], "overflow players not listed as substitutes"
+        return f"{len(full)} leagues balanced"
+
+    async def matchmaking(self):
+        members = [StubMember(self.guild) for _ in range(self.args.queue)]
+        for member in members:
+            self.guild.members[member.id] = member
+        await asyncio.gather(*(
+            self.recorder.measure("queue", self.leagues.queue.callback(
+                StubInteraction(member, self.guild, self.announcements),
+                random.choice(self.indexg.REGION_CHOICES[:2]), self.indexg.GAMEMODE_CHOICES[0], random.choice(self.indexg.MATCHTYPE_CHOICES)
+            ))
+            for member in members
+        ))
+
+        formed = [league_id for league_id, league in self.indexg.league_store.all().items() if league.get("queued")]
+        for league_id in formed:
+            league = self.indexg.league_store.get(league_id)
+            assert len(league["players"]) == self.indexg.get_players_required(league["match_type"]), "queued league has the wrong size"
+            self.league_ids.append(league_id)
+            self.hosts[league_id] = self.guild.get_member(league["host"])
+        return f"{len(formed)} leagues formed, {len(self.indexg.matchmaking.entries)} still queued"
+
+    async def end_leagues(self):
+        await asyncio.gather(*(
+            self.recorder.measure("end-league", self.leagues.end_league.callback(
+                StubInteraction(self.hosts[league_id], self.guild, self.announcements), league_id
+            ))
+            for league_id in self.league_ids
+        ))
+
+    async def run(self):
+        indexg = self.indexg
+        await indexg.load_extensions()
+        self.leagues = indexg.bot.extensions["extensions.leagues"]
+        print(f"startup profile:\n{indexg.startup_profile.report()}\n")
+        indexg.loop_lag.start()
+        started = time.perf_counter()
+
+        phases = [
+            ("host", self.host_leagues),
+            ("join", self.join_clicks),
+            ("burst", self.join_burst),
+            ("churn", self.churn),
+            ("teams", self.balanced_teams),
+            ("queue", self.matchmaking),
+            ("end", self.end_leagues),
+        ]
+        worst_lag = 0.0
+        for name, phase in phases:
+            indexg.loop_lag.max_lag = 0.0
+            phase_started = time.perf_counter()
+            result = await phase()
+            worst_lag = max(worst_lag, indexg.loop_lag.max_lag)
+            print(
+                f"phase {name:<6} {time.perf_counter() - phase_started:8.2f}s"
+                f"  max loop lag {indexg.loop_lag.max_lag * 1000:6.1f}ms" + (f"  {result}" if result else "")
+            )
+
+        await indexg.db.flush()
+        await asyncio.sleep(indexg.outbound.batch_window)
+        elapsed = time.perf_counter() - started
+        indexg.loop_lag.stop()
+        indexg.loop_lag.max_lag = max(worst_lag, indexg.loop_lag.max_lag)
+
+        print()
+        self.recorder.report(elapsed)
+        print()
+        print(indexg.loop_lag.summary())
+        print(f"storage: {indexg.db.stats_summary()}")
+        print(indexg.thread_resolver.summary())
+        print(indexg.outbound.summary())
+        print(indexg.announcements.summary())
+        print(indexg.metrics.summary())
+        assert not indexg.league_store.all(), "leagues left after end-league phase"
+
+
+def bench_team_balance(indexg, trials):
+    print(f"{'team balance':<16}{'trials':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'avg diff':>10}")
+    for label, team_size in (("4v4 exact", 4), ("8v8 heuristic", 8)):
+        samples, diffs = [], []
+        for _ in range(trials):
+            players = [(next(_ids), random.randint(1, 10)) for _ in range(team_size * 2)]
+            started = time.perf_counter()
+            team_a, team_b = indexg.balance_teams(players, team_size)
+            samples.append(time.perf_counter() - started)
+            assert len(team_a) == len(team_b) == team_size
+            diffs.append(abs(sum(level for _, level in team_a) - sum(level for _, level in team_b)))
+        print(
+            f"{label:<16}{trials:>8}"
+            f"{LatencyRecorder.percentile(samples, 50) * 1000:>10.3f}{LatencyRecorder.percentile(samples, 99) * 1000:>10.3f}"
+            f"{max(samples) * 1000:>10.3f}{sum(diffs) / trials:>10.2f}"
+        )
+
+
+def bench_matchmaking(indexg, players):
+    engine = indexg.MatchmakingQueue()
+    samples, formed, placed = [], 0, set()
+    started = time.perf_counter()
+    for player_id in range(players):
+        key = engine.bucket_key(
+            random.randint(1, 4), random.choice(indexg.REGION_CHOICES), random.choice(indexg.GAMEMODE_CHOICES),
+            random.choice(indexg.MATCHTYPE_CHOICES), random.randint(0, 12)
+        )
+        enqueued = time.perf_counter()
+        group = engine.enqueue(player_id, key)
+        samples.append(time.perf_counter() - enqueued)
+        if group:
+            assert len(group) == indexg.get_players_required(key[3]) and placed.isdisjoint(group), "bad match"
+            placed.update(group)
+            formed += 1
+        if engine.entries and random.random() < 0.05:
+            engine.dequeue(random.choice(list(engine.entries)) if len(engine.entries) < 64 else next(iter(engine.entries)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{'matchmaking':<16}{'players':>8}{'p50 us':>10}{'p99 us':>10}{'max us':>10}{'leagues':>10}{'queued':>10}")
+    print(
+        f"{'enqueue':<16}{players:>8}"
+        f"{LatencyRecorder.percentile(samples, 50) * 1e6:>10.2f}{LatencyRecorder.percentile(samples, 99) * 1e6:>10.2f}"
+        f"{max(samples) * 1e6:>10.1f}{formed:>10}{len(engine.entries):>10}"
+    )
+    print(f"simulated {players} queue joins in {elapsed:.2f}s across {len(engine.buckets)} open buckets")
+
+
+def main():
+    global API_LATENCY
+
+    parser = argparse.ArgumentParser(description="Offline load test for the league bot command handlers.")
+    parser.add_argument("--leagues", type=int, default=200, help="leagues to host")
+    parser.add_argument("--joins", type=int, default=5000, help="join clicks spread over all leagues")
+    parser.add_argument("--burst", type=int, default=500, help="simultaneous join clicks on a single league")
+    parser.add_argument("--churn", type=int, default=500, help="random kicks and leaves")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds over which the spread-out join clicks arrive")
+    parser.add_argument("--api-latency", type=float, default=20.0, help="mean simulated Discord API latency in ms")
+    parser.add_argument("--batch-window", type=float, default=0.2, help="join notification batch window in seconds")
+    parser.add_argument("--queue", type=int, default=200, help="players joining the matchmaking queue through /queue")
+    parser.add_argument("--queue-sim", type=int, default=50000, help="players in the offline matchmaking simulation")
+    parser.add_argument("--team-trials", type=int, default=2000, help="random pools per size for the team balance benchmark")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    API_LATENCY = args.api_latency / 1000
+
+    sys.path.insert(0, ROOT)
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        import indexg
+
+        indexg.outbound.batch_window = args.batch_window
+        asyncio.run(Workload(indexg, args).run())
+        print()
+        bench_team_balance(indexg, args.team_trials)
+        print()
+        bench_matchmaking(indexg, args.queue_sim)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1892 @@
+import discord
+from discord.ext import commands
+from discord.ext import tasks
+from discord import app_commands
+from aiohttp import web
+import json
+import random
+import os
+import datetime
+import sqlite3
+import contextlib
+import types
+import asyncio
+import collections
+import concurrent.futures
+import weakref
+import re
+import time
+import logging
+import contextvars
+import functools
+import bisect
+import itertools
+import zlib
+import heapq
+import copy
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+THEME_COLOR = discord.Color.default() 
+DATA_FILE = "data.json"
+DB_FILE = "league.db"
+SNAPSHOT_FILE = "league_snapshot.json"
+WRITE_BATCH_WINDOW = 0.05
+SNAPSHOT_INTERVAL_MINUTES = 10
+JOIN_NOTIFICATION_WINDOW = 2.0
+MESSAGE_LENGTH_LIMIT = 2000
+EMBED_DESCRIPTION_LIMIT = 4096
+LEAGUE_ID_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+LEAGUE_ID_CONFUSABLES = str.maketrans({"O": "0", "I": "1", "L": "1"})
+LEAGUE_ID_LENGTH = 5
+LEAGUE_ID_MIN_PREFIX = 3
+LEAGUE_TTL_HOURS = 24
+REAPER_INTERVAL_MINUTES = 30
+REAPER_GRACE_MINUTES = 10
+REAPER_BATCH_SIZE = 50
+BALANCE_TIME_BUDGET = 0.005
+EXACT_BALANCE_MAX_TEAM_SIZE = 4
+SHARD_COUNT = int(os.environ.get("LEAGUE_BOT_SHARD_COUNT", 0)) or None
+SHARD_IDS = [int(shard_id) for shard_id in os.environ.get("LEAGUE_BOT_SHARD_IDS", "").split(",") if shard_id.strip()] or None
+AUTO_SHARD = os.environ.get("LEAGUE_BOT_AUTO_SHARD") == "1" or SHARD_COUNT is not None or SHARD_IDS is not None
+SHARED_STORE = SHARD_IDS is not None
+WORKER_INDEX = min(SHARD_IDS) if SHARD_IDS else 0
+CHANGE_POLL_INTERVAL = 0.25
+CHANGE_RETENTION_MINUTES = 60
+QUEUE_RANK_BAND_WIDTH = 3
+ANNOUNCEMENT_EDIT_INTERVAL = 5.0
+ANNOUNCEMENT_DEBOUNCE = 0.5
+STRIKE_EXPIRY_DAYS = 30
+STRIKE_SYNC_BATCH_SIZE = 25
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108 + WORKER_INDEX
+METRICS_LOG_INTERVAL_MINUTES = 15
+
+LEAGUE_HOST_ROLE_ID =  
+STAFF_ROLE_ID = 
+PING_ROLE_ID =
+ANNOUNCEMENT_CHANNEL_ID =  
+RANK_ANNOUNCEMENT_CHANNEL_ID = 
+WARN_LOG_CHANNEL_ID = 
+
+HOST_STRIKE_1_ROLE_ID = 
+HOST_STRIKE_2_ROLE_ID = 
+HOST_STRIKE_3_ROLE_ID = 
+STRIKE_ROLES = [HOST_STRIKE_1_ROLE_ID, HOST_STRIKE_2_ROLE_ID, HOST_STRIKE_3_ROLE_ID]
+
+REGION_CHOICES = ["EU", "NA", "ASIA", "SA"]
+GAMEMODE_CHOICES = ["Swift Game", "War Game"]
+MATCHTYPE_CHOICES = ["4v4", "3v3", "2v2", "1v1"]
+PERKS_CHOICES = ["Enabled", "Disabled"]
+
+def load_data(filename):
+    try:
+        with open(filename, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {} 
+
+class Database:
+    def __init__(self, filename, batch_window=WRITE_BATCH_WINDOW):
+        self.filename = filename
+        self.conn = None
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        self.batch_window = batch_window
+        self.stats = collections.Counter()
+        self._pending = {}
+        self._waiters = []
+        self._flush_handle = None
+        self._flush_lock = asyncio.Lock()
+        self.origin = str(os.getpid())
+        self.changelog_tables = set()
+        self.file_locks = None
+
+    def open(self):
+        self.conn = sqlite3.connect(self.filename, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    @contextlib.contextmanager
+    def transaction(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def execute_many(self, statements):
+        with self.transaction() as conn:
+            for sql, params in statements:
+                conn.execute(sql, params)
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
+
+    def enqueue(self, writes, clear_table=None):
+        if clear_table is not None:
+            self._pending = {slot: stmt for slot, stmt in self._pending.items() if slot[0] != clear_table}
+            self._pending[(clear_table, None)] = (f"DELETE FROM {clear_table}", ())
+
+        for slot, statement in writes.items():
+            if slot in self._pending:
+                self.stats["writes_coalesced"] += 1
+            self._pending[slot] = statement
+        self.stats["mutations"] += len(writes)
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, lambda: asyncio.ensure_future(self.flush()))
+        return waiter
+
+    def is_pending(self, table, key):
+        return (table, key) in self._pending
+
+    async def flush(self):
+        async with self._flush_lock:
+            await self._flush()
+
+    async def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._waiters:
+            return
+
+        statements, waiters = list(self._pending.values()), self._waiters
+        if self.changelog_tables:
+            now = time.time()
+            statements += [
+                ("INSERT INTO changes (tbl, key, origin, created_at) VALUES (?, ?, ?, ?)", (table, key, self.origin, now))
+                for table, key in self._pending if table in self.changelog_tables
+            ]
+        self._pending, self._waiters = {}, []
+
+        try:
+            await self.run(self.execute_many, statements)
+        except Exception as e:
+            print(f"Failed to commit {len(statements)} queued writes: {e}")
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            return
+
+        self.stats["writes_issued"] += 1
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def stats_summary(self):
+        return (
+            f"{self.stats['mutations']} mutations, {self.stats['writes_coalesced']} coalesced, "
+            f"{self.stats['writes_issued']} writes issued"
+        )
+
+class FileLocks:
+    def __init__(self, filename, slots=4096, retry_interval=0.005):
+        if fcntl is None:
+            raise RuntimeError("Sharing the store between processes needs fcntl (Linux or macOS).")
+        self.fd = os.open(filename, os.O_RDWR | os.O_CREAT)
+        self.slots = slots
+        self.retry_interval = retry_interval
+        self.stats = collections.Counter()
+        self._held = collections.Counter()
+
+    def slot(self, name):
+        return zlib.crc32(name.encode()) % self.slots
+
+    async def acquire(self, name):
+        slot = self.slot(name)
+        while not self._held[slot]:
+            try:
+                fcntl.lockf(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, slot)
+                break
+            except OSError:
+                self.stats["contended"] += 1
+                await asyncio.sleep(self.retry_interval)
+        self._held[slot] += 1
+
+    def release(self, name):
+        slot = self.slot(name)
+        self._held[slot] -= 1
+        if not self._held[slot]:
+            del self._held[slot]
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, slot)
+
+class SharedLock:
+    def __init__(self, namespace, key, local_lock):
+        self.namespace = namespace
+        self.key = key
+        self.local_lock = local_lock
+        self.name = f"{namespace.table}:{key}"
+
+    async def __aenter__(self):
+        await self.local_lock.acquire()
+        try:
+            await self.namespace.db.file_locks.acquire(self.name)
+        except BaseException:
+            self.local_lock.release()
+            raise
+        try:
+            await self.namespace.refresh(self.key)
+        except BaseException:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        try:
+            await self.namespace.db.flush()
+        finally:
+            self.namespace.db.file_locks.release(self.name)
+            self.local_lock.release()
+
+class ChangeFeed:
+    def __init__(self, db: Database, namespaces, interval=CHANGE_POLL_INTERVAL):
+        self.db = db
+        self.namespaces = {namespace.table: namespace for namespace in namespaces}
+        self.interval = interval
+        self.stats = collections.Counter()
+        self.last_seq = 0
+        self._task = None
+        self.db.changelog_tables = set(self.namespaces)
+
+    def open(self):
+        self.db.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                tbl TEXT NOT NULL,
+                key TEXT,
+                origin TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            """
+        )
+        self.last_seq = self.db.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"Change feed poll failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _fetch(self, since, prune):
+        rows = self.db.conn.execute(
+            "SELECT seq, tbl, key FROM changes WHERE seq > ? AND origin != ? ORDER BY seq", (since, self.db.origin)
+        ).fetchall()
+        changed = {}
+        for _, table, key in rows:
+            namespace = self.namespaces.get(table)
+            if namespace is not None:
+                changed[(table, key)] = namespace._read_all() if key is None else namespace._read(key)
+
+        if prune:
+            self.db.conn.execute("DELETE FROM changes WHERE created_at < ?", (time.time() - CHANGE_RETENTION_MINUTES * 60,))
+        return (rows[-1][0] if rows else since), changed
+
+    async def poll(self):
+        self.stats["polls"] += 1
+        prune = self.stats["polls"] % 240 == 0
+        self.last_seq, changed = await self.db.run(self._fetch, self.last_seq, prune)
+        for (table, key), value in changed.items():
+            namespace = self.namespaces[table]
+            if key is None:
+                namespace._reset_cache(value)
+            elif self.db.is_pending(table, key):
+                self.stats["skipped"] += 1
+                continue
+            elif value is None:
+                namespace._drop_cached(key)
+            else:
+                namespace._set_cached(key, value)
+            self.stats["applied"] += 1
+
+    def summary(self):
+        return f"change feed: seq {self.last_seq}, {self.stats['applied']} applied, {self.stats['skipped']} skipped"
+
+class Namespace:
+    table = None
+    key_column = "key"
+    meta_key = None
+
+    def __init__(self, db: Database):
+        self.db = db
+        self._cache = {}
+        self._locks = weakref.WeakValueDictionary()
+
+    def open(self, legacy_filename):
+        self.create_table()
+        self.migrate_json(legacy_filename)
+        self.load()
+
+    def create_table(self):
+        self.db.conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({self.key_column} TEXT PRIMARY KEY, data TEXT NOT NULL)")
+
+    def load(self):
+        rows = self.db.conn.execute(f"SELECT {self.key_column}, data FROM {self.table}")
+        self._reset_cache({key: json.loads(raw) for key, raw in rows})
+
+    def get(self, key, default=None):
+        return self._cache.get(str(key), default)
+
+    def lock(self, key):
+        key = str(key)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        if self.db.file_locks is not None:
+            return SharedLock(self, key, lock)
+        return lock
+
+    def lock_order(self, keys):
+        if self.db.file_locks is None:
+            return sorted(keys)
+        return sorted(keys, key=lambda key: (self.db.file_locks.slot(f"{self.table}:{key}"), key))
+
+    async def refresh(self, key):
+        if self.db.is_pending(self.table, key):
+            return
+        stored = await self.db.run(self._read, key)
+        if stored is None:
+            self._drop_cached(key)
+        elif stored != self._cache.get(key):
+            self._set_cached(key, stored)
+
+    def all(self):
+        return types.MappingProxyType(self._cache)
+
+    def put(self, key, value):
+        key = str(key)
+        self._set_cached(key, value)
+        return self._settle(key, self.db.enqueue({(self.table, key): self._upsert(key, value)}))
+
+    def delete(self, key):
+        key = str(key)
+        self._drop_cached(key)
+        statement = (f"DELETE FROM {self.table} WHERE {self.key_column} = ?", (key,))
+        return self._settle(key, self.db.enqueue({(self.table, key): statement}))
+
+    async def replace(self, data):
+        data = {str(k): v for k, v in data.items()}
+        self._reset_cache(data)
+        writes = {(self.table, key): self._upsert(key, value) for key, value in data.items()}
+        await self.db.enqueue(writes, clear_table=self.table)
+
+    async def _settle(self, key, waiter):
+        started = time.perf_counter()
+        try:
+            await waiter
+        except Exception:
+            stored = await self.db.run(self._read, key)
+            if stored is None:
+                self._drop_cached(key)
+            else:
+                self._set_cached(key, stored)
+            raise
+        finally:
+            add_timing("storage", time.perf_counter() - started)
+
+    def _reset_cache(self, data):
+        self._cache = data
+
+    def _set_cached(self, key, value):
+        self._cache[key] = value
+
+    def _drop_cached(self, key):
+        self._cache.pop(key, None)
+
+    def _read(self, key):
+        row = self.db.conn.execute(f"SELECT data FROM {self.table} WHERE {self.key_column} = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _read_all(self):
+        return {key: json.loads(raw) for key, raw in self.db.conn.execute(f"SELECT {self.key_column}, data FROM {self.table}")}
+
+    def _upsert(self, key, value):
+        return (
+            f"INSERT INTO {self.table} ({self.key_column}, data) VALUES (?, ?) "
+            f"ON CONFLICT({self.key_column}) DO UPDATE SET data = excluded.data",
+            (key, json.dumps(value, separators=(",", ":")))
+        )
+
+    def is_legacy_entry(self, value):
+        return False
+
+    def migrate_json(self, filename):
+        if self.db.conn.execute("SELECT 1 FROM meta WHERE key = ?", (self.meta_key,)).fetchone():
+            return 0
+
+        legacy = {str(k): v for k, v in load_data(filename).items() if self.is_legacy_entry(v)}
+        statements = [self._upsert(key, value) for key, value in legacy.items()]
+        statements.append(("INSERT INTO meta (key, value) VALUES (?, ?)", (self.meta_key, datetime.datetime.now(datetime.timezone.utc).isoformat())))
+        self.db.execute_many(statements)
+
+        if legacy:
+            print(f"Migrated {len(legacy)} {self.table} entries from {filename} into {self.db.filename}.")
+        return len(legacy)
+
+class LeagueStore(Namespace):
+    table = "leagues"
+    key_column = "league_id"
+    meta_key = "json_migrated"
+
+    def __init__(self, db: Database):
+        super().__init__(db)
+        self.retired_ids = set()
+        self._reset_cache({})
+
+    def create_table(self):
+        self.db.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS leagues (
+                league_id TEXT PRIMARY KEY,
+                thread_id INTEGER,
+                data TEXT NOT NULL,
+                created_at REAL,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_leagues_thread_id ON leagues(thread_id);
+            """
+        )
+        archive_table = """
+            CREATE TABLE IF NOT EXISTS leagues_archive (
+                league_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                created_at REAL,
+                updated_at REAL,
+                archived_at REAL NOT NULL,
+                PRIMARY KEY (league_id, archived_at)
+            )
+        """
+        archive_key = [row[1] for row in self.db.conn.execute("PRAGMA table_info(leagues_archive)") if row[5]]
+        if archive_key == ["league_id"]:
+            with self.db.transaction() as conn:
+                conn.execute("ALTER TABLE leagues_archive RENAME TO leagues_archive_old")
+                conn.execute(archive_table)
+                conn.execute("INSERT INTO leagues_archive SELECT league_id, data, reason, created_at, updated_at, archived_at FROM leagues_archive_old")
+                conn.execute("DROP TABLE leagues_archive_old")
+        else:
+            self.db.conn.execute(archive_table)
+        columns = {row[1] for row in self.db.conn.execute("PRAGMA table_info(leagues)")}
+        for column in ("created_at", "updated_at"):
+            if column not in columns:
+                self.db.conn.execute(f"ALTER TABLE leagues ADD COLUMN {column} REAL")
+        now = time.time()
+        self.db.conn.execute("UPDATE leagues SET created_at = COALESCE(created_at, ?), updated_at = COALESCE(updated_at, ?) WHERE updated_at IS NULL", (now, now))
+
+    def load(self):
+        rows = self.db.conn.execute("SELECT league_id, data, created_at, updated_at FROM leagues").fetchall()
+        self._reset_cache({key: json.loads(raw) for key, raw, _, _ in rows})
+        now = time.time()
+        self.timestamps = {key: (created_at or now, updated_at or now) for key, _, created_at, updated_at in rows}
+        self.retired_ids = {row[0] for row in self.db.conn.execute("SELECT league_id FROM leagues_archive UNION SELECT league_id FROM league_history")}
+
+    def _upsert(self, key, value):
+        created_at, updated_at = self.timestamps.get(key) or (time.time(),) * 2
+        return (
+            "INSERT INTO leagues (league_id, thread_id, data, created_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(league_id) DO UPDATE SET thread_id = excluded.thread_id, data = excluded.data, updated_at = excluded.updated_at",
+            (key, value.get("thread_id"), json.dumps(value, separators=(",", ":")), created_at, updated_at)
+        )
+
+    def archive(self, reasons):
+        archived_at = time.time()
+        writes = {}
+        for key, reason in reasons.items():
+            league = self._cache.get(key)
+            if league is None:
+                continue
+            created_at, updated_at = self.timestamps[key]
+            writes[("leagues_archive", key)] = (
+                "INSERT INTO leagues_archive (league_id, data, reason, created_at, updated_at, archived_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(league, separators=(",", ":")), reason, created_at, updated_at, archived_at)
+            )
+            writes[("leagues", key)] = ("DELETE FROM leagues WHERE league_id = ?", (key,))
+            self._drop_cached(key)
+
+        keys = [key for table, key in writes if table == "leagues"]
+        return self._settle_archive(keys, self.db.enqueue(writes) if writes else None)
+
+    async def _settle_archive(self, keys, waiter):
+        if waiter is not None:
+            await asyncio.gather(*(self._settle(key, waiter) for key in keys))
+        return len(keys)
+
+    def _reset_cache(self, data):
+        super()._reset_cache(data)
+        self._indexed = {}
+        self.by_thread = {}
+        self.by_message = {}
+        self.by_host = collections.defaultdict(set)
+        self.by_player = collections.defaultdict(set)
+        self.sorted_ids = sorted(data)
+        self._reserved = set()
+        now = time.time()
+        self.timestamps = {key: (now, now) for key in data}
+        for key, value in data.items():
+            self._index(key, value)
+
+    def _set_cached(self, key, value):
+        self._unindex(key)
+        if key not in self._cache:
+            bisect.insort(self.sorted_ids, key)
+            self._reserved.discard(key)
+        now = time.time()
+        self.timestamps[key] = (self.timestamps.get(key, (now,))[0], now)
+        super()._set_cached(key, value)
+        self._index(key, value)
+
+    def _drop_cached(self, key):
+        self._unindex(key)
+        if key in self._cache:
+            del self.sorted_ids[bisect.bisect_left(self.sorted_ids, key)]
+            self.retired_ids.add(key)
+        self.timestamps.pop(key, None)
+        super()._drop_cached(key)
+
+    def _index(self, key, league):
+        entry = (league.get("thread_id"), league.get("announcement_msg_id"), league.get("host"), frozenset(league.get("players", ())))
+        thread_id, msg_id, host_id, players = entry
+        if thread_id:
+            self.by_thread[int(thread_id)] = key
+        if msg_id:
+            self.by_message[int(msg_id)] = key
+        if host_id:
+            self.by_host[int(host_id)].add(key)
+        for player_id in players:
+            self.by_player[int(player_id)].add(key)
+        self._indexed[key] = entry
+
+    def _unindex(self, key):
+        entry = self._indexed.pop(key, None)
+        if entry is None:
+            return
+        thread_id, msg_id, host_id, players = entry
+        if thread_id and self.by_thread.get(int(thread_id)) == key:
+            del self.by_thread[int(thread_id)]
+        if msg_id and self.by_message.get(int(msg_id)) == key:
+            del self.by_message[int(msg_id)]
+        if host_id:
+            hosted = self.by_host.get(int(host_id))
+            if hosted is not None:
+                hosted.discard(key)
+                if not hosted:
+                    del self.by_host[int(host_id)]
+        for player_id in players:
+            joined = self.by_player.get(int(player_id))
+            if joined is not None:
+                joined.discard(key)
+                if not joined:
+                    del self.by_player[int(player_id)]
+
+    def find_by_thread(self, thread_id):
+        league_id = self.by_thread.get(int(thread_id))
+        return league_id, self._cache.get(league_id)
+
+    def find_by_message(self, message_id):
+        league_id = self.by_message.get(int(message_id))
+        return league_id, self._cache.get(league_id)
+
+    def hosted_by(self, host_id):
+        return frozenset(self.by_host.get(int(host_id), ()))
+
+    def joined_by(self, player_id):
+        return frozenset(self.by_player.get(int(player_id), ()))
+
+    def find_by_prefix(self, prefix, limit=25):
+        start = bisect.bisect_left(self.sorted_ids, prefix)
+        matches = []
+        for league_id in itertools.islice(self.sorted_ids, start, None):
+            if not league_id.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.append(league_id)
+        return matches
+
+    def new_id(self):
+        length = LEAGUE_ID_LENGTH
+        attempts = 0
+        while True:
+            league_id = ''.join(random.choices(LEAGUE_ID_ALPHABET, k=length))
+            if SHARED_STORE:
+                league_id = LEAGUE_ID_ALPHABET[WORKER_INDEX % len(LEAGUE_ID_ALPHABET)] + league_id[1:]
+            if league_id not in self._cache and league_id not in self._reserved and league_id not in self.retired_ids:
+                self._reserved.add(league_id)
+                return league_id
+            attempts += 1
+            if attempts % 8 == 0:
+                length += 1
+
+    def is_legacy_entry(self, value):
+        return isinstance(value, dict) and "players" in value and "host" in value
+
+class StrikeStore(Namespace):
+    table = "strikes"
+    key_column = "user_id"
+    meta_key = "json_migrated:strikes"
+
+    def is_legacy_entry(self, value):
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def load(self):
+        super().load()
+        expires_at = time.time() + STRIKE_EXPIRY_DAYS * 86400
+        legacy = {key: {"expires": [expires_at] * max(value, 0)} for key, value in self._cache.items() if self.is_legacy_entry(value)}
+        if legacy:
+            self.db.execute_many([self._upsert(key, value) for key, value in legacy.items()])
+            self._cache.update(legacy)
+            print(f"Converted {len(legacy)} strike counts into strikes expiring in {STRIKE_EXPIRY_DAYS} days.")
+
+    def active(self, user_id, now=None):
+        now = time.time() if now is None else now
+        return sorted(expires_at for expires_at in self.get(user_id, {}).get("expires", ()) if expires_at > now)
+
+RankInfo = collections.namedtuple("RankInfo", ["level", "name", "color"])
+UNRANKED = RankInfo(0, "Unranked", THEME_COLOR)
+
+def compile_rank_table(rank_data):
+    rank_table = {}
+    for order, (role_id_str, config) in enumerate(rank_data.items()):
+        try:
+            role_id = int(role_id_str)
+        except ValueError:
+            continue
+
+        level = config.get('level', 0)
+        if level <= 0:
+            continue
+
+        hex_code = config.get('color', '#808080')
+        try:
+            color = discord.Color(int(hex_code.lstrip('#'), 16))
+        except ValueError:
+            color = THEME_COLOR
+
+        name = config.get('name', config.get('role_name', f"Rank {role_id_str}"))
+        rank_table[role_id] = ((level, -order), RankInfo(level, name, color))
+    return rank_table
+
+class RankStore(Namespace):
+    table = "ranks"
+    key_column = "role_id"
+    meta_key = "json_migrated:ranks"
+
+    def __init__(self, db: Database):
+        super().__init__(db)
+        self._rank_table = None
+        self._rank_choices = None
+        self._member_ranks = {}
+
+    def _reset_cache(self, data):
+        super()._reset_cache(data)
+        self.invalidate()
+
+    def _set_cached(self, key, value):
+        super()._set_cached(key, value)
+        self.invalidate()
+
+    def _drop_cached(self, key):
+        super()._drop_cached(key)
+        self.invalidate()
+
+    def invalidate(self, member: discord.Member | None = None):
+        if member is None:
+            self._rank_table = None
+            self._rank_choices = None
+            self._member_ranks.clear()
+        else:
+            self._member_ranks.pop((member.guild.id, member.id), None)
+
+    @property
+    def rank_table(self):
+        if self._rank_table is None:
+            self._rank_table = compile_rank_table(self._cache)
+        return self._rank_table
+
+    @property
+    def rank_choices(self):
+        if self._rank_choices is None:
+            choices = [app_commands.Choice(name="None (Open League)", value="None")]
+            for role_id_str, config in sorted(self._cache.items(), key=lambda item: item[1].get('level', 0), reverse=True):
+                name = config.get('name', config.get('role_name', f"Rank {role_id_str}"))
+                if config.get('level', 0) > 0:
+                    choices.append(app_commands.Choice(name=f"Min Rank: {name}", value=role_id_str))
+            self._rank_choices = tuple(choices)
+        return self._rank_choices
+
+    def resolve(self, member: discord.Member) -> RankInfo:
+        key = (member.guild.id, member.id)
+        rank = self._member_ranks.get(key)
+        if rank is None:
+            rank_table = self.rank_table
+            matches = [rank_table[role.id] for role in member.roles if role.id in rank_table]
+            rank = max(matches)[1] if matches else UNRANKED
+            self._member_ranks[key] = rank
+        return rank
+
+    def is_legacy_entry(self, value):
+        return isinstance(value, dict) and "level" in value and "players" not in value
+
+class LeagueHistory:
+    page_size = 10
+
+    def __init__(self, db: Database):
+        self.db = db
+
+    def create_table(self):
+        self.db.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS league_history (
+                league_id TEXT NOT NULL,
+                ended_at REAL NOT NULL,
+                created_at REAL,
+                host_id INTEGER NOT NULL,
+                ended_by INTEGER,
+                match_type TEXT,
+                game_mode TEXT,
+                region TEXT,
+                player_count INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (league_id, ended_at)
+            );
+            CREATE INDEX IF NOT EXISTS idx_league_history_host ON league_history(host_id, ended_at);
+            CREATE INDEX IF NOT EXISTS idx_league_history_ended ON league_history(ended_at);
+            CREATE TABLE IF NOT EXISTS league_history_players (
+                player_id INTEGER NOT NULL,
+                ended_at REAL NOT NULL,
+                league_id TEXT NOT NULL,
+                PRIMARY KEY (player_id, ended_at, league_id)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def record(self, league_id, league, created_at, ended_by):
+        ended_at = time.time()
+        players = [int(player_id) for player_id in league.get("players", [])]
+        slot = (league_id, ended_at)
+        return self.db.enqueue({
+            ("league_history", slot): (
+                "INSERT INTO league_history (league_id, ended_at, created_at, host_id, ended_by, match_type, game_mode, region, player_count, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (league_id, ended_at, created_at, int(league["host"]), ended_by, league.get("match_type"), league.get("game_mode"),
+                 league.get("region"), len(players), json.dumps(league, separators=(",", ":")))
+            ),
+            ("league_history_players", slot): (
+                "INSERT OR IGNORE INTO league_history_players (player_id, ended_at, league_id) SELECT value, ?, ? FROM json_each(?)",
+                (ended_at, league_id, json.dumps(players))
+            ),
+        })
+
+    def _page(self, host_id, player_id, before, limit):
+        columns = "h.league_id, h.ended_at, h.created_at, h.host_id, h.match_type, h.game_mode, h.player_count"
+        if player_id is not None:
+            sql = (
+                f"SELECT {columns} FROM league_history_players p "
+                "JOIN league_history h ON h.league_id = p.league_id AND h.ended_at = p.ended_at "
+                "WHERE p.player_id = ? AND p.ended_at < ?"
+            )
+            params = [player_id, before]
+            if host_id is not None:
+                sql += " AND h.host_id = ?"
+                params.append(host_id)
+            sql += " ORDER BY p.ended_at DESC LIMIT ?"
+        elif host_id is not None:
+            sql = f"SELECT {columns} FROM league_history h WHERE h.host_id = ? AND h.ended_at < ? ORDER BY h.ended_at DESC LIMIT ?"
+            params = [host_id, before]
+        else:
+            sql = f"SELECT {columns} FROM league_history h WHERE h.ended_at < ? ORDER BY h.ended_at DESC LIMIT ?"
+            params = [before]
+        return self.db.conn.execute(sql, (*params, limit)).fetchall()
+
+    async def page(self, host_id=None, player_id=None, before=None):
+        rows = await self.db.run(self._page, host_id, player_id, float("inf") if before is None else before, self.page_size + 1)
+        return rows[:self.page_size], len(rows) > self.page_size
+
+    def _host_stats(self, host_id, since):
+        count, players, duration = self.db.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(player_count), 0), AVG(ended_at - created_at) FROM league_history WHERE host_id = ? AND ended_at >= ?",
+            (host_id, since)
+        ).fetchone()
+        by_match_type = self.db.conn.execute(
+            "SELECT match_type, COUNT(*) FROM league_history WHERE host_id = ? AND ended_at >= ? GROUP BY match_type ORDER BY COUNT(*) DESC",
+            (host_id, since)
+        ).fetchall()
+        return count, players, duration, by_match_type
+
+    async def host_stats(self, host_id, since):
+        return await self.db.run(self._host_stats, host_id, since)
+
+db = Database(DB_FILE)
+league_store = LeagueStore(db)
+strike_store = StrikeStore(db)
+rank_store = RankStore(db)
+league_history = LeagueHistory(db)
+
+change_feed = ChangeFeed(db, (league_store, strike_store, rank_store)) if SHARED_STORE else None
+
+def open_storage():
+    db.open()
+    if change_feed is not None:
+        db.file_locks = FileLocks(f"{DB_FILE}.locks")
+        change_feed.open()
+    league_history.create_table()
+    for namespace in (league_store, strike_store, rank_store):
+        namespace.open(DATA_FILE)
+
+def load_league_data(): return dict(league_store.all())
+def load_rank_data(): return dict(rank_store.all())
+async def save_rank_data(data): await rank_store.replace(data)
+
+def atomic_write(filename, payload):
+    temp_filename = f"{filename}.tmp"
+    with open(temp_filename, "w") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_filename, filename)
+
+async def write_snapshot(filename=SNAPSHOT_FILE):
+    payload = json.dumps({
+        "leagues": dict(league_store.all()),
+        "strikes": dict(strike_store.all()),
+        "ranks": dict(rank_store.all()),
+    }, indent=4)
+    await db.run(atomic_write, filename, payload)
+
+@tasks.loop(minutes=SNAPSHOT_INTERVAL_MINUTES)
+async def snapshot_task():
+    try:
+        await write_snapshot()
+    except Exception as e:
+        print(f"Failed to write snapshot {SNAPSHOT_FILE}: {e}")
+        return
+    print(f"Snapshot written to {SNAPSHOT_FILE} ({db.stats_summary()}).")
+
+class LoopLagMonitor:
+    def __init__(self, interval=0.05, warn_threshold=0.25):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.samples = collections.deque(maxlen=2000)
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.warn_threshold:
+                print(f"Event loop stalled for {lag * 1000:.0f} ms.")
+
+    def percentile(self, pct):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def summary(self):
+        return f"loop lag p50={self.percentile(50) * 1000:.1f}ms p99={self.percentile(99) * 1000:.1f}ms max={self.max_lag * 1000:.1f}ms"
+
+loop_lag = LoopLagMonitor()
+
+current_timer = contextvars.ContextVar("current_timer", default=None)
+
+class CommandTimer:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.defer = None
+        self.phases = collections.Counter()
+        self.finished = False
+
+def add_timing(phase, seconds):
+    timer = current_timer.get()
+    if timer is not None:
+        timer.phases[phase] += seconds
+
+class CommandMetrics:
+    def __init__(self):
+        self.calls = collections.Counter()
+        self.failures = collections.Counter()
+        self.deferred = collections.Counter()
+        self.seconds = collections.defaultdict(collections.Counter)
+        self.latencies = collections.defaultdict(lambda: collections.deque(maxlen=1000))
+
+    def start(self, name):
+        timer = CommandTimer(name)
+        current_timer.set(timer)
+        return timer
+
+    def finish(self, timer, failed=False):
+        if timer is None or timer.finished:
+            return
+        timer.finished = True
+        total = time.perf_counter() - timer.started
+
+        self.calls[timer.name] += 1
+        if failed:
+            self.failures[timer.name] += 1
+        if timer.defer is not None:
+            self.deferred[timer.name] += 1
+            self.seconds[timer.name]["defer"] += timer.defer
+        self.seconds[timer.name]["total"] += total
+        self.seconds[timer.name]["storage"] += timer.phases["storage"]
+        self.seconds[timer.name]["discord_api"] += timer.phases["discord_api"]
+        self.latencies[timer.name].append(total)
+
+    def render(self):
+        lines = [
+            "# HELP league_bot_command_calls_total Handled commands and button clicks.",
+            "# TYPE league_bot_command_calls_total counter",
+        ]
+        lines += [f'league_bot_command_calls_total{{command="{name}"}} {count}' for name, count in self.calls.items()]
+        lines += [
+            "# HELP league_bot_command_failures_total Commands and button clicks that raised.",
+            "# TYPE league_bot_command_failures_total counter",
+        ]
+        lines += [f'league_bot_command_failures_total{{command="{name}"}} {self.failures[name]}' for name in self.calls]
+        lines += [
+            "# HELP league_bot_command_seconds_total Time spent per command, split by phase.",
+            "# TYPE league_bot_command_seconds_total counter",
+        ]
+        for name, phases in self.seconds.items():
+            lines += [f'league_bot_command_seconds_total{{command="{name}",phase="{phase}"}} {seconds:.6f}' for phase, seconds in phases.items()]
+        lines += [
+            "# TYPE league_bot_loop_lag_seconds gauge",
+            f'league_bot_loop_lag_seconds{{quantile="0.5"}} {loop_lag.percentile(50):.6f}',
+            f'league_bot_loop_lag_seconds{{quantile="0.99"}} {loop_lag.percentile(99):.6f}',
+            "# TYPE league_bot_storage_events_total counter",
+        ]
+        lines += [f'league_bot_storage_events_total{{event="{event}"}} {count}' for event, count in db.stats.items()]
+        lines += ["# TYPE league_bot_thread_cache_events_total counter"]
+        lines += [f'league_bot_thread_cache_events_total{{event="{event}"}} {count}' for event, count in thread_resolver.stats.items()]
+        lines += [
+            "# TYPE league_bot_active_leagues gauge",
+            f"league_bot_active_leagues {len(league_store.all())}",
+            "# TYPE league_bot_leagues_archived_total counter",
+        ]
+        lines += [f'league_bot_leagues_archived_total{{reason="{reason}"}} {count}' for reason, count in reaper.stats.items()]
+        lines += [
+            "# TYPE league_bot_matchmaking_queued gauge",
+            f"league_bot_matchmaking_queued {len(matchmaking.entries)}",
+            "# TYPE league_bot_matchmaking_leagues_formed_total counter",
+            f"league_bot_matchmaking_leagues_formed_total {matchmaking.stats['matches']}",
+            "# TYPE league_bot_announcement_edits_total counter",
+            f"league_bot_announcement_edits_total {announcements.stats['edits']}",
+            "# TYPE league_bot_announcement_changes_coalesced_total counter",
+            f"league_bot_announcement_changes_coalesced_total {announcements.stats['coalesced']}",
+            "# TYPE league_bot_outbound_queue_depth gauge",
+            f"league_bot_outbound_queue_depth {outbound.queue_depth}",
+            "# TYPE league_bot_outbound_rate_limited_total counter",
+            f"league_bot_outbound_rate_limited_total {outbound.stats['http_429'] + outbound.rate_limits.count}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        lines = [f"{'command':<18}{'calls':>7}{'fails':>7}{'p50 ms':>9}{'p99 ms':>9}{'defer ms':>10}{'storage ms':>12}{'api ms':>9}"]
+        for name, count in self.calls.most_common():
+            ordered = sorted(self.latencies[name])
+            p50 = ordered[int(len(ordered) * 0.5)] * 1000
+            p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000
+            defer_ms = self.seconds[name]["defer"] / self.deferred[name] * 1000 if self.deferred[name] else 0.0
+            storage_ms = self.seconds[name]["storage"] / count * 1000
+            api_ms = self.seconds[name]["discord_api"] / count * 1000
+            lines.append(f"{name:<18}{count:>7}{self.failures[name]:>7}{p50:>9.1f}{p99:>9.1f}{defer_ms:>10.1f}{storage_ms:>12.1f}{api_ms:>9.1f}")
+        return "\n".join(lines)
+
+metrics = CommandMetrics()
+
+def instrumented(name):
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            timer = metrics.start(name)
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                metrics.finish(timer, failed=True)
+                raise
+            metrics.finish(timer)
+            return result
+        return wrapper
+    return decorator
+
+def instrument_http(http):
+    request = http.request
+
+    async def timed_request(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await request(*args, **kwargs)
+        finally:
+            add_timing("discord_api", time.perf_counter() - started)
+
+    http.request = timed_request
+
+async def defer(interaction: discord.Interaction, **kwargs):
+    started = time.perf_counter()
+    await interaction.response.defer(**kwargs)
+    add_timing("discord_api", time.perf_counter() - started)
+    timer = current_timer.get()
+    if timer is not None and timer.defer is None:
+        timer.defer = time.perf_counter() - timer.started
+
+async def start_metrics_server():
+    async def serve_metrics(request):
+        return web.Response(text=metrics.render(), content_type="text/plain")
+
+    app = web.Application()
+    app.router.add_get("/metrics", serve_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    except OSError as e:
+        print(f"Metrics endpoint disabled, could not listen on {METRICS_HOST}:{METRICS_PORT}: {e}")
+        await runner.cleanup()
+        return
+    print(f"Metrics available at http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+@tasks.loop(minutes=METRICS_LOG_INTERVAL_MINUTES)
+async def metrics_log_task():
+    if metrics.calls:
+        print(f"Command metrics ({loop_lag.summary()}):\n{metrics.summary()}")
+
+class StartupProfile:
+    def __init__(self):
+        self.timings = collections.defaultdict(dict)
+
+    def record(self, name, phase, seconds):
+        self.timings[name][phase] = seconds
+
+    @contextlib.contextmanager
+    def measure(self, name, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, phase, time.perf_counter() - started)
+
+    def report(self):
+        lines = [f"{'component':<24}{'import ms':>11}{'setup ms':>10}{'total ms':>10}"]
+        for name, phases in self.timings.items():
+            imported, setup = phases.get("import", 0.0) * 1000, phases.get("setup", 0.0) * 1000
+            lines.append(f"{name:<24}{imported:>11.1f}{setup:>10.1f}{imported + setup:>10.1f}")
+        total = sum(sum(phases.values()) for phases in self.timings.values()) * 1000
+        lines.append(f"{'total':<24}{'':>11}{'':>10}{total:>10.1f}")
+        return "\n".join(lines)
+
+startup_profile = StartupProfile()
+
+def generate_league_id():
+    return league_store.new_id()
+
+def normalize_league_id(league_id: str) -> str:
+    return league_id.strip().upper().translate(LEAGUE_ID_CONFUSABLES)
+
+def get_players_required(match_type: str) -> int:
+    try:
+        return int(match_type.split('v')[0]) * 2
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+def is_league_host(interaction: discord.Interaction):
+    role = discord.utils.get(interaction.user.roles, id=LEAGUE_HOST_ROLE_ID)
+    return role is not None
+
+def is_staff(target):
+    if isinstance(target, discord.Interaction):
+        member = target.user
+    elif isinstance(target, commands.Context):
+        member = target.author
+    else:
+        member = target 
+        
+    if isinstance(member, discord.Member):
+        return discord.utils.get(member.roles, id=STAFF_ROLE_ID) is not None
+    return False
+
+def get_strike_role_id(count):
+    if count == 1:
+        return HOST_STRIKE_1_ROLE_ID
+    elif count == 2:
+        return HOST_STRIKE_2_ROLE_ID
+    elif count == 3:
+        return HOST_STRIKE_3_ROLE_ID
+    return None
+
+def strike_roles_for(member: discord.Member, strike_count: int, revoke_host: bool = False) -> list[discord.Role]:
+    dropped = set(STRIKE_ROLES)
+    if revoke_host:
+        dropped.add(LEAGUE_HOST_ROLE_ID)
+    roles = [role for role in member.roles if role.id not in dropped and role.id != member.guild.id]
+    strike_role = member.guild.get_role(get_strike_role_id(strike_count)) if strike_count < 3 else None
+    if strike_role:
+        roles.append(strike_role)
+    return roles
+
+
+async def get_league_info(interaction: discord.Interaction, league_id: str = None):
+    started = time.perf_counter()
+    try:
+        return find_league(interaction, league_id)
+    finally:
+        add_timing("storage", time.perf_counter() - started)
+
+def find_league(interaction: discord.Interaction, league_id: str = None):
+    if not league_id:
+        if isinstance(interaction.channel, discord.Thread):
+            return league_store.find_by_thread(interaction.channel_id)
+        return None, None
+
+    league = league_store.get(league_id)
+    if league:
+        return league_id, league
+
+    league_id = normalize_league_id(league_id)
+    league = league_store.get(league_id)
+    if league:
+        return league_id, league
+
+    if len(league_id) >= LEAGUE_ID_MIN_PREFIX:
+        matches = league_store.find_by_prefix(league_id, limit=2)
+        if len(matches) == 1:
+            return matches[0], league_store.get(matches[0])
+    
+    return None, None
+
+def get_member_highest_rank_level(member: discord.Member) -> int:
+    return rank_store.resolve(member).level
+
+def get_rank_details(member: discord.Member) -> tuple[str, discord.Color]:
+    rank = rank_store.resolve(member)
+    return rank.name, rank.color
+
+def balance_teams(players: list[tuple[int, int]], team_size: int, time_budget: float = BALANCE_TIME_BUDGET):
+    if team_size <= EXACT_BALANCE_MAX_TEAM_SIZE:
+        return exact_balance(players, team_size)
+    return heuristic_balance(players, team_size, time_budget)
+
+def exact_balance(players, team_size):
+    total = sum(level for _, level in players)
+    best, best_diff = [], None
+    for rest in itertools.combinations(range(1, len(players)), team_size - 1):
+        picked = (0, *rest)
+        diff = abs(total - 2 * sum(players[i][1] for i in picked))
+        if best_diff is None or diff < best_diff:
+            best, best_diff = [picked], diff
+        elif diff == best_diff:
+            best.append(picked)
+
+    picked = set(random.choice(best))
+    team_a = [player for i, player in enumerate(players) if i in picked]
+    team_b = [player for i, player in enumerate(players) if i not in picked]
+    return random.sample([team_a, team_b], 2)
+
+def heuristic_balance(players, team_size, time_budget):
+    deadline = time.perf_counter() + time_budget
+    team_a, team_b = [], []
+    sum_a = sum_b = 0
+    for player in sorted(players, key=lambda p: (p[1], random.random()), reverse=True):
+        if len(team_b) >= team_size or (len(team_a) < team_size and sum_a <= sum_b):
+            team_a.append(player)
+            sum_a += player[1]
+        else:
+            team_b.append(player)
+            sum_b += player[1]
+
+    while time.perf_counter() < deadline:
+        diff = sum_a - sum_b
+        best = None
+        for i, (_, level_a) in enumerate(team_a):
+            for j, (_, level_b) in enumerate(team_b):
+                swapped = abs(diff - 2 * (level_a - level_b))
+                if swapped < abs(diff) and (best is None or swapped < best[0]):
+                    best = (swapped, i, j)
+        if best is None:
+            break
+        _, i, j = best
+        sum_a += team_b[j][1] - team_a[i][1]
+        sum_b += team_a[i][1] - team_b[j][1]
+        team_a[i], team_b[j] = team_b[j], team_a[i]
+    return team_a, team_b
+
+async def gather_calls(**calls):
+    results = await asyncio.gather(*calls.values(), return_exceptions=True)
+    outcome = dict(zip(calls, results))
+    for label, result in outcome.items():
+        if isinstance(result, Exception):
+            print(f"Error during {label}: {result}")
+    return outcome
+
+class ThreadResolver:
+    def __init__(self, max_size=1024, ttl=600, negative_ttl=120):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stats = collections.Counter()
+        self._entries = collections.OrderedDict()
+
+    async def resolve(self, guild: discord.Guild, thread_id: int | None) -> discord.Thread | None:
+        if not thread_id:
+            return None
+        thread_id = int(thread_id)
+
+        thread = guild.get_thread(thread_id)
+        if thread:
+            self.stats["gateway_hits"] += 1
+            return thread
+
+        entry = self._entries.get(thread_id)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(thread_id)
+            self.stats["negative_hits" if entry[1] is None else "hits"] += 1
+            return entry[1]
+
+        self.stats["misses"] += 1
+        try:
+            thread = await guild.fetch_channel(thread_id)
+        except discord.NotFound:
+            self._store(thread_id, None, self.negative_ttl)
+            return None
+        except Exception as e:
+            print(f"Error fetching thread {thread_id}: {e}")
+            return None
+
+        thread = thread if isinstance(thread, discord.Thread) else None
+        self._store(thread_id, thread, self.ttl if thread else self.negative_ttl)
+        return thread
+
+    def _store(self, thread_id, thread, ttl):
+        self._entries[thread_id] = (time.monotonic() + ttl, thread)
+        self._entries.move_to_end(thread_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def forget(self, thread_id):
+        self._entries.pop(int(thread_id), None)
+
+    def mark_deleted(self, thread_id):
+        self._store(int(thread_id), None, self.negative_ttl)
+
+    def is_deleted(self, thread_id):
+        entry = self._entries.get(int(thread_id))
+        return entry is not None and entry[1] is None and entry[0] > time.monotonic()
+
+    def summary(self):
+        return (
+            f"threads: {self.stats['hits']} hits, {self.stats['negative_hits']} negative hits, "
+            f"{self.stats['misses']} misses, {self.stats['gateway_hits']} gateway hits, {len(self._entries)} cached"
+        )
+
+thread_resolver = ThreadResolver()
+
+async def resolve_thread(guild: discord.Guild, thread_id: int | None) -> discord.Thread | None:
+    return await thread_resolver.resolve(guild, thread_id)
+
+async def with_thread(guild: discord.Guild, thread_id: int | None, **actions):
+    thread = await resolve_thread(guild, thread_id)
+    if thread is None:
+        return None, {}
+    return thread, await gather_calls(**{label: action(thread) for label, action in actions.items()})
+
+def mention_list(user_ids, limit=40):
+    mentions = [f"<@{uid}>" for uid in list(user_ids)[:limit]]
+    if len(user_ids) > limit:
+        mentions.append(f"and {len(user_ids) - limit} more" if mentions else f"{len(user_ids)} members")
+    return ", ".join(mentions)
+
+
+def build_join_embed(entries) -> discord.Embed:
+    if len(entries) == 1:
+        member, league_id, is_host_add = entries[0]
+        rank_name, rank_color = get_rank_details(member)
+        
+        action_source = "Host added" if is_host_add else "Joined via button"
+        
+        embed = discord.Embed(
+            title="Player Joined League",
+            description=f"**{member.mention}** has been added to the league!",
+            color=THEME_COLOR
+        )
+        embed.set_author(name=f"{member.display_name} | Rank: {rank_name}", icon_url=member.display_avatar.url)
+        embed.add_field(name="League ID", value=league_id, inline=True)
+        embed.add_field(name="Source", value=action_source, inline=True)
+        embed.set_footer(text="Good luck!")
+        return embed
+
+    lines = []
+    length = 0
+    for index, (member, league_id, is_host_add) in enumerate(entries):
+        rank_name, _ = get_rank_details(member)
+        action_source = "Host added" if is_host_add else "Joined via button"
+        line = f"**{member.mention}** | Rank: {rank_name} | {action_source}"
+        if length + len(line) + 1 > EMBED_DESCRIPTION_LIMIT - 40:
+            lines.append(f"and {len(entries) - index} more players")
+            break
+        lines.append(line)
+        length += len(line) + 1
+
+    embed = discord.Embed(
+        title=f"{len(entries)} Players Joined League",
+        description="\n".join(lines),
+        color=THEME_COLOR
+    )
+    embed.add_field(name="League ID", value=entries[0][1], inline=True)
+    embed.set_footer(text="Good luck!")
+    return embed
+
+class RateLimitCounter(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.count = 0
+
+    def emit(self, record):
+        if "responded with 429" in str(record.msg) or "Global rate limit" in str(record.msg):
+            self.count += 1
+
+class OutboundScheduler:
+    def __init__(self, batch_window=JOIN_NOTIFICATION_WINDOW):
+        self.batch_window = batch_window
+        self.stats = collections.Counter()
+        self.rate_limits = RateLimitCounter()
+        logging.getLogger("discord.http").addHandler(self.rate_limits)
+        self._queues = collections.defaultdict(collections.deque)
+        self._workers = {}
+        self._pending_joins = {}
+
+    def submit(self, bucket, call):
+        future = asyncio.get_running_loop().create_future()
+        self._queues[bucket].append((call, future, current_timer.get()))
+        if bucket not in self._workers:
+            self._workers[bucket] = asyncio.create_task(self._drain(bucket))
+        return future
+
+    async def _drain(self, bucket):
+        queue = self._queues[bucket]
+        try:
+            while queue:
+                call, future, timer = queue.popleft()
+                current_timer.set(timer)
+                try:
+                    result = await call()
+                except Exception as e:
+                    if isinstance(e, discord.HTTPException) and e.status == 429:
+                        self.stats["http_429"] += 1
+                    self.stats["failed"] += 1
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    self.stats["sent"] += 1
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            del self._workers[bucket]
+            if not queue:
+                self._queues.pop(bucket, None)
+
+    def notify_join(self, thread: discord.Thread, member: discord.Member, league_id: str, is_host_add: bool = False):
+        pending = self._pending_joins.get(thread.id)
+        if pending is None:
+            pending = self._pending_joins[thread.id] = []
+            asyncio.get_running_loop().call_later(self.batch_window, self._flush_joins, thread)
+        pending.append((member, league_id, is_host_add))
+        self.stats["join_notifications"] += 1
+
+    def _flush_joins(self, thread: discord.Thread):
+        entries = self._pending_joins.pop(thread.id, [])
+        if not entries:
+            return
+        self.stats["join_notifications_merged"] += len(entries) - 1
+
+        def log_failure(future):
+            if not future.cancelled() and future.exception():
+                print(f"Failed to send join notification to thread {thread.id}: {future.exception()}")
+
+        future = self.submit(("messages", thread.id), lambda: thread.send(embed=build_join_embed(entries)))
+        future.add_done_callback(log_failure)
+
+    @property
+    def queue_depth(self):
+        return sum(len(queue) for queue in self._queues.values()) + sum(len(pending) for pending in self._pending_joins.values())
+
+    def summary(self):
+        return (
+            f"outbound: depth {self.queue_depth}, {self.stats['sent']} sent, {self.stats['failed']} failed, "
+            f"{self.stats['join_notifications_merged']} join notifications merged, "
+            f"{self.stats['http_429'] + self.rate_limits.count} rate limited"
+        )
+
+outbound = OutboundScheduler()
+
+class LeagueReaper:
+    def __init__(self, ttl_hours=LEAGUE_TTL_HOURS, grace_minutes=REAPER_GRACE_MINUTES, batch_size=REAPER_BATCH_SIZE):
+        self.ttl = ttl_hours * 3600
+        self.grace = grace_minutes * 60
+        self.batch_size = batch_size
+        self.stats = collections.Counter()
+        self._orphaned = {}
+        self._checked = {}
+
+    def mark_orphaned(self, league_id, reason):
+        if league_id and league_store.get(league_id):
+            self._orphaned.setdefault(league_id, reason)
+
+    async def find_candidates(self):
+        now = time.time()
+        candidates = {key: reason for key, reason in self._orphaned.items() if league_store.get(key)}
+        self._orphaned.clear()
+
+        eligible = []
+        for key, (created_at, updated_at) in league_store.timestamps.items():
+            if key in candidates:
+                continue
+            if updated_at < now - self.ttl:
+                candidates[key] = "inactive"
+            elif updated_at <= now - self.grace:
+                eligible.append(key)
+
+        self._checked = {key: checked_at for key, checked_at in self._checked.items() if key in league_store.timestamps}
+        eligible.sort(key=lambda key: (self._checked.get(key, 0.0), league_store.timestamps[key][1]))
+        thread_checks = 0
+        for key in eligible:
+            if thread_checks >= self.batch_size:
+                break
+            league = league_store.get(key)
+            channel = bot.get_channel(league.get("announcement_channel_id"))
+            if channel is None:
+                if not SHARED_STORE:
+                    candidates[key] = "missing announcement channel"
+                continue
+            thread_checks += 1
+            self._checked[key] = now
+            thread_id = league.get("thread_id")
+            if thread_id and await thread_resolver.resolve(channel.guild, thread_id) is None and thread_resolver.is_deleted(thread_id):
+                candidates[key] = "missing thread"
+        return candidates
+
+    async def sweep(self):
+        candidates = await self.find_candidates()
+        cutoff = time.time() - self.ttl
+        keys = sorted(candidates)
+        archived = 0
+
+        for start in range(0, len(keys), self.batch_size):
+            batch = keys[start:start + self.batch_size]
+            async with contextlib.AsyncExitStack() as stack:
+                for key in league_store.lock_order(batch):
+                    await stack.enter_async_context(league_store.lock(key))
+                reasons = {
+                    key: candidates[key] for key in batch
+                    if league_store.get(key) and (candidates[key] != "inactive" or league_store.timestamps[key][1] < cutoff)
+                }
+                staged = league_store.archive(reasons)
+            count = await staged
+            archived += count
+            self.stats.update(reasons.values())
+        return archived
+
+    def summary(self):
+        return ", ".join(f"{count} {reason}" for reason, count in self.stats.most_common()) or "nothing archived"
+
+reaper = LeagueReaper()
+
+@tasks.loop(minutes=REAPER_INTERVAL_MINUTES)
+async def reaper_task():
+    try:
+        archived = await reaper.sweep()
+    except Exception as e:
+        print(f"League reaper failed: {e}")
+        return
+    if archived:
+        print(f"Archived {archived} stale leagues ({reaper.summary()}); {len(league_store.all())} active.")
+
+class StrikeExpiryScheduler:
+    def __init__(self, batch_size=STRIKE_SYNC_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.stats = collections.Counter()
+        self._heap = []
+        self._wakeup = None
+        self._task = None
+
+    def schedule(self, user_id, expires_at):
+        heapq.heappush(self._heap, (expires_at, str(user_id)))
+        if self._wakeup is not None and self._heap[0][0] == expires_at:
+            self._wakeup.set()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._heap = [(expires_at, user_id) for user_id in strike_store.all() for expires_at in strike_store.active(user_id)]
+        heapq.heapify(self._heap)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            now = time.time()
+            due = set()
+            while self._heap and self._heap[0][0] <= now:
+                due.add(heapq.heappop(self._heap)[1])
+            if due:
+                try:
+                    await self.expire(due)
+                except Exception as e:
+                    print(f"Strike expiry failed: {e}")
+                continue
+
+            self._wakeup.clear()
+            timeout = min(self._heap[0][0] - now, 3600) if self._heap else 3600
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                if SHARED_STORE:
+                    self._heap = [(expires_at, user_id) for user_id in strike_store.all() for expires_at in strike_store.active(user_id)]
+                    heapq.heapify(self._heap)
+
+    async def expire(self, user_ids):
+        staged, counts = [], {}
+        for user_id in user_ids:
+            async with strike_store.lock(user_id):
+                current = strike_store.get(user_id)
+                active = strike_store.active(user_id)
+                counts[user_id] = len(active)
+                if current is None or len(active) == len(current.get("expires", ())):
+                    continue
+                staged.append(strike_store.put(user_id, {"expires": active}) if active else strike_store.delete(user_id))
+        await asyncio.gather(*staged)
+        self.stats["expired"] += len(staged)
+
+        pending = list(counts.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            results = await gather_calls(**{user_id: self.sync_roles(int(user_id), count) for user_id, count in batch})
+            self.stats["role_syncs"] += sum(result for result in results.values() if isinstance(result, int))
+
+    async def sync_roles(self, user_id, strike_count):
+        edits = 0
+        for guild in bot.guilds:
+            member = guild.get_member(user_id)
+            if member is None:
+                continue
+            roles = strike_roles_for(member, strike_count)
+            if {role.id for role in roles} != {role.id for role in member.roles if role.id != guild.id}:
+                await member.edit(roles=roles, reason=f"Host strike expired ({strike_count} active).")
+                edits += 1
+        return edits
+
+strike_expiry = StrikeExpiryScheduler()
+
+class MatchmakingQueue:
+    def __init__(self, band_width=QUEUE_RANK_BAND_WIDTH):
+        self.band_width = band_width
+        self.buckets = {}
+        self.entries = {}
+        self.stats = collections.Counter()
+
+    def bucket_key(self, guild_id, region, game_mode, match_type, level):
+        return guild_id, region, game_mode, match_type, max(level, 0) // self.band_width
+
+    def enqueue(self, player_id, key):
+        bucket = self.buckets.setdefault(key, {})
+        bucket[player_id] = time.monotonic()
+        self.entries[player_id] = key
+        self.stats["enqueued"] += 1
+
+        required = get_players_required(key[3])
+        if len(bucket) < required:
+            return None
+
+        group = list(itertools.islice(bucket, required))
+        for queued_id in group:
+            del bucket[queued_id]
+            del self.entries[queued_id]
+        if not bucket:
+            del self.buckets[key]
+        self.stats["matches"] += 1
+        return group
+
+    def requeue(self, group, key):
+        group = [player_id for player_id in group if player_id not in self.entries]
+        if not group:
+            return
+        bucket = self.buckets.get(key, {})
+        now = time.monotonic()
+        self.buckets[key] = {**{player_id: now for player_id in group}, **bucket}
+        for player_id in group:
+            self.entries[player_id] = key
+
+    def dequeue(self, player_id):
+        key = self.entries.pop(player_id, None)
+        if key is None:
+            return None
+        bucket = self.buckets[key]
+        del bucket[player_id]
+        if not bucket:
+            del self.buckets[key]
+        self.stats["left"] += 1
+        return key
+
+    def waiting(self, key):
+        return len(self.buckets.get(key, ()))
+
+    def summary(self):
+        return (
+            f"matchmaking: {len(self.entries)} queued in {len(self.buckets)} buckets, "
+            f"{self.stats['matches']} leagues formed, {self.stats['left']} left"
+        )
+
+matchmaking = MatchmakingQueue()
+
+async def send_join_notification(thread_channel: discord.Thread, member: discord.Member, league_id: str, is_host_add: bool = False):
+    outbound.notify_join(thread_channel, member, league_id, is_host_add)
+
+def is_player_eligible(member: discord.Member, required_rank_id: str | None) -> bool:
+    if required_rank_id is None:
+        return True
+    
+    required_level = rank_store.get(required_rank_id, {}).get('level', 0)
+
+    if required_level == 0 and required_rank_id != "None":
+        return False
+
+    member_highest_level = get_member_highest_rank_level(member)
+    
+    return member_highest_level >= required_level
+
+def get_rank_role_choices() -> list[app_commands.Choice[str]]:
+    return list(rank_store.rank_choices)
+
+@instrumented("join-button")
+async def handle_join(interaction: discord.Interaction, league_id: str | None):
+    await defer(interaction, ephemeral=True, thinking=True)
+    
+    member = interaction.user
+    league = league_store.get(league_id) if league_id else None
+
+    if not league:
+        await interaction.followup.send("This league no longer exists.", ephemeral=True)
+        return
+
+    required_rank_id = league.get("rank_required_id")
+    if required_rank_id is not None and required_rank_id != "None":
+        if not is_player_eligible(member, required_rank_id):
+            required_rank_name = rank_store.get(required_rank_id, {}).get('name', 'N/A')
+            
+            await interaction.followup.send(
+                f"This league requires a minimum rank of **{required_rank_name}** or higher.\n"
+                "Your highest current rank does not meet this requirement.", 
+                ephemeral=True
+            )
+            return
+
+    error = None
+
+    async with league_store.lock(league_id):
+        league = league_store.get(league_id)
+        players_required = get_players_required(league["match_type"]) if league else 0
+
+        if not league:
+            error = "This league no longer exists."
+        elif players_required != 0 and len(league["players"]) >= players_required:
+            error = "This league is full!"
+        elif member.id in league["players"]:
+            error = "You are already in this league."
+        else:
+            league["players"].append(member.id)
+            saved = league_store.put(league_id, league)
+            player_count = len(league["players"])
+
+    if error:
+        await interaction.followup.send(error, ephemeral=True)
+        return
+
+    await saved
+    announcements.touch(league_id)
+    
+    thread_channel, results = await with_thread(
+        interaction.guild, league.get("thread_id"),
+        add_user=lambda thread: outbound.submit(("thread_members", thread.id), lambda: thread.add_user(member)),
+        join_notification=lambda thread: send_join_notification(thread, member, league_id, is_host_add=False),
+    )
+
+    if thread_channel is None:
+        thread_status = "Warning: Could not find the league's private thread."
+    elif isinstance(results["add_user"], discord.Forbidden):
+        thread_status = "Could not add you to the thread (Bot lacks permissions)."
+    elif isinstance(results["add_user"], Exception):
+        thread_status = f"Error adding you to the thread: {results['add_user']}"
+    else:
+        thread_status = f"You have been added to the private thread: {thread_channel.mention}."
+
+    await interaction.followup.send(
+        f"You have joined League **{league_id}**! ({player_count}/{players_required} players)\n\n"
+        f"{thread_status}",
+        ephemeral=True
+    )
+
+class JoinButton(discord.ui.DynamicItem[discord.ui.Button], template=r"join_league:(?P<league_id>[0-9A-Za-z]+)"):
+    def __init__(self, league_id: str):
+        super().__init__(
+            discord.ui.Button(label="Join League", style=discord.ButtonStyle.blurple, custom_id=f"join_league:{league_id}")
+        )
+        self.league_id = league_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match: re.Match[str]):
+        return cls(match["league_id"])
+
+    async def callback(self, interaction: discord.Interaction):
+        await handle_join(interaction, self.league_id)
+
+class JoinButtonView(discord.ui.View):
+    def __init__(self, league_id, required_rank_id: str | None = None, full: bool = False):
+        super().__init__(timeout=None) 
+        self.league_id = league_id
+        self.required_rank_id = required_rank_id if required_rank_id != "None" else None
+        button = JoinButton(str(league_id))
+        if full:
+            button.item.label = "League Full"
+            button.item.disabled = True
+        self.add_item(button)
+
+class AnnouncementUpdater:
+    def __init__(self, interval=ANNOUNCEMENT_EDIT_INTERVAL, debounce=ANNOUNCEMENT_DEBOUNCE):
+        self.interval = interval
+        self.debounce = debounce
+        self.stats = collections.Counter()
+        self._scheduled = {}
+        self._last_edit = {}
+        self._base_embeds = {}
+
+    def touch(self, league_id):
+        self.stats["changes"] += 1
+        if league_id in self._scheduled:
+            self.stats["coalesced"] += 1
+            return
+        loop = asyncio.get_running_loop()
+        delay = max(self.debounce, self._last_edit.get(league_id, 0) + self.interval - loop.time())
+        self._scheduled[league_id] = loop.call_later(delay, lambda: asyncio.ensure_future(self._edit(league_id)))
+
+    def forget(self, league_id):
+        handle = self._scheduled.pop(league_id, None)
+        if handle is not None:
+            handle.cancel()
+        self._last_edit.pop(league_id, None)
+        self._base_embeds.pop(league_id, None)
+
+    async def _base_embed(self, channel, msg_id, league_id):
+        base = self._base_embeds.get(league_id)
+        if base is None:
+            message = await channel.fetch_message(msg_id)
+            base = message.embeds[0].to_dict() if message.embeds else {"title": f"League {league_id}"}
+            base["fields"] = [field for field in base.get("fields", []) if not field["name"].startswith("Roster")]
+            self._base_embeds[league_id] = base
+        return base
+
+    async def _edit(self, league_id):
+        self._scheduled.pop(league_id, None)
+        league = league_store.get(league_id)
+        channel = bot.get_channel(league.get("announcement_channel_id")) if league else None
+        msg_id = league.get("announcement_msg_id") if league else None
+        if not channel or not msg_id:
+            self.forget(league_id)
+            return
+
+        self._last_edit[league_id] = asyncio.get_running_loop().time()
+        players_required = get_players_required(league["match_type"])
+        full = players_required != 0 and len(league["players"]) >= players_required
+
+        try:
+            embed = discord.Embed.from_dict(copy.deepcopy(await self._base_embed(channel, msg_id, league_id)))
+            embed.add_field(
+                name=f"Roster ({len(league['players'])}/{players_required})" + (" | FULL" if full else ""),
+                value=mention_list(league["players"], limit=30) or "No players yet",
+                inline=False
+            )
+            view = JoinButtonView(league_id, league.get("rank_required_id"), full=full)
+            await outbound.submit(("messages", channel.id), lambda: self._apply(league_id, channel.get_partial_message(msg_id), embed, view))
+        except discord.NotFound:
+            reaper.mark_orphaned(league_id, "announcement deleted")
+            self.forget(league_id)
+        except Exception as e:
+            print(f"Failed to update the announcement for league {league_id}: {e}")
+
+    async def _apply(self, league_id, message, embed, view):
+        if league_store.get(league_id) is None:
+            self.stats["skipped"] += 1
+            return
+        await message.edit(embed=embed, view=view)
+        self.stats["edits"] += 1
+
+    def summary(self):
+        return (
+            f"announcements: {self.stats['changes']} roster changes, {self.stats['coalesced']} coalesced, "
+            f"{self.stats['edits']} edits"
+        )
+
+announcements = AnnouncementUpdater()
+
+class LegacyJoinButtonView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label="Join League", style=discord.ButtonStyle.blurple, custom_id="join_league_btn")
+    async def join_callback(self, interaction: discord.Interaction, button: discord.ui.Button):
+        league_id, _ = league_store.find_by_message(interaction.message.id)
+        await handle_join(interaction, league_id)
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type is discord.InteractionType.application_command and interaction.command:
+            interaction.extras["timer"] = metrics.start(interaction.command.qualified_name)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        metrics.finish(interaction.extras.get("timer"), failed=True)
+        await super().on_error(interaction, error)
+
+intents = discord.Intents.default()
+intents.members = True 
+intents.message_content = True 
+
+shard_options = {"shard_count": SHARD_COUNT, "shard_ids": SHARD_IDS} if AUTO_SHARD else {}
+bot_class = commands.AutoShardedBot if AUTO_SHARD else commands.Bot
+bot = bot_class(command_prefix="?", intents=intents, help_command=None, activity=discord.Game(name="/help | Dev: Skye"), status=discord.Status.idle, tree_cls=InstrumentedCommandTree, **shard_options)
@@ -0,0 +1,37 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from core import *
+
+@app_commands.command(name="help", description="Show all commands")
+async def help_command(interaction: discord.Interaction):
+    embed = discord.Embed(
+        title="League Bot Commands",
+        description="Here are the commands for managing leagues and moderation:",
+        color=THEME_COLOR
+    )
+    embed.add_field(name="/host-league", value="Host a new league. Now features **rank hierarchy** for restrictions.", inline=False)
+    embed.add_field(name="/randomize-teams", value="Randomly split joined players into two teams (2v2, 3v3, 4v4 only). Pick **Balanced** mode to even out rank levels.", inline=False)
+    embed.add_field(name="/add-member", value="Add a member to your hosted league (Respects minimum rank requirements).", inline=False)
+    embed.add_field(name="/kick-member", value="Kick a member from your hosted league.", inline=False)
+    embed.add_field(name="/add-members", value="Add several members (mentions or a role) to your hosted league at once.", inline=False)
+    embed.add_field(name="/kick-members", value="Kick several members (mentions or a role) from your hosted league at once.", inline=False)
+    embed.add_field(name="/leave-league", value="Leave a league.", inline=False)
+    embed.add_field(name="/status", value="Check status and players of a league.", inline=False)
+    embed.add_field(name="/queue", value="Queue for a league by region, game mode and match type. A league and private thread are created once enough players of your rank band queue.", inline=False)
+    embed.add_field(name="/leave-queue", value="Leave the matchmaking queue.", inline=False)
+    embed.add_field(name="/end-league", value="End a league, disable the join button, and delete the thread.", inline=False)
+    embed.add_field(name="/league-history", value="Browse ended leagues, filtered by host or player.", inline=False)
+    embed.add_field(name="/host-stats", value="See how many leagues a host ran recently.", inline=False)
+    embed.add_field(name="/warn", value="Issue a Host Strike to a user (Host Strike system only. Staff only).", inline=False)
+    embed.add_field(name="/moderate", value="[STAFF] Apply a moderation action (Kick, Ban, Timeout) to a user.", inline=False)
+    embed.add_field(name="/set-rank", value="Map a Discord role to a specific Rank Name, Color, and **Level** (for hierarchy checks).", inline=False)
+    embed.add_field(name="/rank-list", value="View all configured rank roles and their levels.", inline=False)
+    embed.add_field(name="/reload-extension", value="[STAFF] Reload the league, rank, moderation or help commands without restarting the bot.", inline=False)
+   
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    with startup_profile.measure(__name__, "setup"):
+        bot.tree.add_command(help_command, override=True)
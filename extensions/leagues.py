@@ -0,0 +1,801 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import random
+import re
+import time
+import asyncio
+import collections
+
+from core import *
+
+async def on_raw_thread_delete(payload: discord.RawThreadDeleteEvent):
+    thread_resolver.mark_deleted(payload.thread_id)
+    reaper.mark_orphaned(league_store.find_by_thread(payload.thread_id)[0], "thread deleted")
+
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    reaper.mark_orphaned(league_store.find_by_message(payload.message_id)[0], "announcement deleted")
+
+async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
+    matchmaking.dequeue(payload.user.id)
+    for league_id in league_store.hosted_by(payload.user.id):
+        reaper.mark_orphaned(league_id, "host left")
+
+async def form_queued_league(guild: discord.Guild, key, group):
+    guild_id, region, game_mode, match_type, band = key
+    members = [guild.get_member(player_id) for player_id in group]
+    if any(member is None for member in members):
+        matchmaking.requeue([member.id for member in members if member is not None], key)
+        return None
+
+    channel = bot.get_channel(ANNOUNCEMENT_CHANNEL_ID)
+    league_id = generate_league_id()
+    try:
+        thread = await channel.create_thread(name=f"League {league_id}", type=discord.ChannelType.private_thread, invitable=False)
+    except Exception as e:
+        print(f"Failed to create a thread for queued league {league_id}: {e}")
+        matchmaking.requeue(group, key)
+        return None
+
+    host = max(members, key=lambda member: (discord.utils.get(member.roles, id=LEAGUE_HOST_ROLE_ID) is not None, get_member_highest_rank_level(member)))
+    league = {
+        "host": host.id,
+        "players": list(group),
+        "region": region,
+        "game_mode": game_mode,
+        "match_type": match_type,
+        "perks": "Disabled",
+        "private_link": None,
+        "announcement_msg_id": None,
+        "announcement_channel_id": channel.id,
+        "thread_id": thread.id,
+        "thread_msg_id": None,
+        "rank_required_id": None,
+        "queued": True,
+    }
+    await league_store.put(league_id, league)
+
+    embed = discord.Embed(
+        title=f"Matchmaking League {league_id}",
+        description=f"**{region}** | **{game_mode}** | **{match_type}** | Rank band {band}",
+        color=THEME_COLOR
+    )
+    embed.add_field(name="Host", value=host.mention, inline=False)
+    embed.add_field(name="Players", value="\n".join(member.mention for member in members), inline=False)
+    embed.set_footer(text=f"ID: {league_id} | Use /randomize-teams to pick teams.")
+
+    await gather_calls(
+        **{f"add {member.id}": outbound.submit(("thread_members", thread.id), lambda member=member: thread.add_user(member)) for member in members},
+        announcement=outbound.submit(("messages", thread.id), lambda: thread.send(" ".join(member.mention for member in members), embed=embed)),
+    )
+    return league_id, thread
+
+class QueueTicketView(discord.ui.View):
+    def __init__(self, player_id: int):
+        super().__init__(timeout=900)
+        self.player_id = player_id
+
+    @discord.ui.button(label="Leave Queue", style=discord.ButtonStyle.grey)
+    async def leave_queue(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if matchmaking.dequeue(self.player_id) is None:
+            await interaction.response.edit_message(content="You are no longer in the queue.", view=None)
+        else:
+            await interaction.response.edit_message(content="You left the matchmaking queue.", view=None)
+
+@bot.tree.command(name="set-rank", description="Map a Discord Role to a Rank Name, Color, and Level.")
+@app_commands.describe(
+    role="The Discord Role to map to a Rank.",
+    rank_name="The display name of the rank (e.g., Diamond I).",
+    level="The numerical level of the rank (Higher is better, e.g., Gold=uncement_msg_id": announcement_msg.id, 
+        "announcement_channel_id": announcement_channel.id,
+        "thread_id": thread.id,
+        "thread_msg_id": thread_msg.id,
+        "rank_required_id": required_rank_id 
+    }
+    await league_store.put(league_id, league_data)
+    
+    await interaction.followup.send(f"{league_type_label} League **{league_id}** hosted successfully! Check {announcement_channel.mention} for the join message.", ephemeral=True)
+
+@host_league.autocomplete('region')
+async def region_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    return await autocomplete_handler(interaction, current, REGION_CHOICES)
+
+@host_league.autocomplete('game_mode')
+async def gamemode_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    return await autocomplete_handler(interaction, current, GAMEMODE_CHOICES)
+
+@host_league.autocomplete('match_type')
+async def matchtype_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    return await autocomplete_handler(interaction, current, MATCHTYPE_CHOICES)
+
+@host_league.autocomplete('perks')
+async def perks_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    return await autocomplete_handler(interaction, current, PERKS_CHOICES)
+
+@app_commands.command(name="add-member", description="Add a member to your league")
+@app_commands.describe(member="Member to add", league_id="League ID (Optional if run in thread)")
+async def add_member(interaction: discord.Interaction, member: discord.Member, league_id: str = None):
+    await defer(interaction, ephemeral=True)
+    
+    if not is_league_host(interaction):
+        await interaction.followup.send("Only League Hosts can add members.", ephemeral=True)
+        return
+
+    league_id, league = await get_league_info(interaction, league_id)
+
+    if not league:
+        await interaction.followup.send("League not found. Please specify the `league_id` or run the command inside the league's private thread.", ephemeral=True)
+        return
+        
+    if interaction.user.id != league["host"]:
+        await interaction.followup.send("You can only add members to the league you are hosting.", ephemeral=True)
+        return
+
+    required_rank_id = league.get("rank_required_id", None)
+    
+    if required_rank_id and required_rank_id != "None":
+        if not is_player_eligible(member, required_rank_id):
+            required_rank_name = rank_store.get(required_rank_id, {}).get('name', 'N/A')
+            
+            await interaction.followup.send(
+                f"Cannot add {member.mention}. This league requires a minimum rank of **{required_rank_name}** or higher.", 
+                ephemeral=True
+            )
+            return
+        
+    async with league_store.lock(league_id):
+        league = league_store.get(league_id)
+        error = None
+
+        if not league:
+            error = "This league no longer exists."
+        elif member.id in league["players"]:
+            error = f"{member.mention} is already in the league **{league_id}**."
+        else:
+            league["players"].append(member.id)
+            saved = league_store.put(league_id, league)
+
+    if error:
+        await interaction.followup.send(error, ephemeral=True)
+        return
+
+    await saved
+    announcements.touch(league_id)
+    
+    thread_channel, results = await with_thread(
+        interaction.guild, league.get("thread_id"),
+        add_user=lambda thread: outbound.submit(("thread_members", thread.id), lambda: thread.add_user(member)),
+        join_notification=lambda thread: send_join_notification(thread, member, league_id, is_host_add=True),
+    )
+
+    if thread_channel:
+        if not any(isinstance(result, Exception) for result in results.values()):
+            await interaction.followup.send(f"{member.mention} has been added to the league **{league_id}** and the coordination thread.", ephemeral=False)
+        else:
+            await interaction.followup.send(f"Warning: {member.mention} has been added to the league **{league_id}**, but failed to add them to the thread and send notification.", ephemeral=False)
+    else:
+        await interaction.followup.send(f"{member.mention} has been added to the league **{league_id}**. Warning: Thread not found.", ephemeral=False)
+
+
+@app_commands.command(name="kick-member", description="Kick a member from your league")
+@app_commands.describe(member="Member to kick", league_id="League ID (Optional if run in thread)")
+async def kick_member(interaction: discord.Interaction, member: discord.Member, league_id: str = None):
+    await defer(interaction, ephemeral=True)
+
+    if not is_league_host(interaction):
+        await interaction.followup.send("Only League Hosts can kick members.", ephemeral=True)
+        return
+    
+    league_id, league = await get_league_info(interaction, league_id)
+
+    if not league:
+        await interaction.followup.send("League not found. Please specify the `league_id` or run the command inside the league's private thread.", ephemeral=True)
+        return
+        
+    if interaction.user.id != league["host"]:
+        await interaction.followup.send("You can only kick members from the league you are hosting.", ephemeral=True)
+        return
+
+    if member.id == league["host"]:
+        await interaction.followup.send("You cannot kick the host. Use /end-league if you wish to close the league.", ephemeral=True)
+        return
+
+    async with league_store.lock(league_id):
+        league = league_store.get(league_id)
+        error = None
+
+        if not league:
+            error = "This league no longer exists."
+        elif member.id not in league["players"]:
+            error = f"{member.mention} is not in the league **{league_id}**."
+        else:
+            league["players"].remove(member.id)
+            saved = league_store.put(league_id, league)
+
+    if error:
+        await interaction.followup.send(error, ephemeral=True)
+        return
+
+    await saved
+    announcements.touch(league_id)
+    
+    thread_channel, results = await with_thread(
+        interaction.guild, league.get("thread_id"),
+        remove_user=lambda thread: outbound.submit(("thread_members", thread.id), lambda: thread.remove_user(member)),
+        kick_notice=lambda thread: outbound.submit(("messages", thread.id), lambda: thread.send(f"{member.mention} was kicked from the league.")),
+    )
+
+    if thread_channel:
+        if not any(isinstance(result, Exception) for result in results.values()):
+            await interaction.followup.send(f"{member.mention} has been kicked from the league **{league_id}** and removed from the coordination thread.", ephemeral=False)
+        else:
+            await interaction.followup.send(f"Warning: {member.mention} has been kicked from the league **{league_id}**, but failed to remove them from the thread.", ephemeral=False)
+    else:
+        await interaction.followup.send(f"{member.mention} has been kicked from the league **{league_id}**. Warning: Thread not found.", ephemeral=False)
+
+
+MEMBER_MENTION_PATTERN = re.compile(r"<@!?(\d+)>|\b(\d{15,20})\b")
+
+async def collect_members(guild: discord.Guild, members: str | None, role: discord.Role | None):
+    ids = list(dict.fromkeys(int(mention or raw) for mention, raw in MEMBER_MENTION_PATTERN.findall(members or "")))
+    found = {uid: guild.get_member(uid) for uid in ids}
+    fetched = await gather_calls(**{str(uid): guild.fetch_member(uid) for uid, member in found.items() if member is None})
+    for uid, result in fetched.items():
+        found[int(uid)] = None if isinstance(result, Exception) else result
+
+    if role:
+        for member in role.members:
+            found.setdefault(member.id, member)
+
+    unknown = [uid for uid, member in found.items() if member is None]
+    return [member for member in found.values() if member is not None], unknown
+
+def roster_summary(verb: str, league_id: str, changed, skipped, unknown, thread_channel, thread_failed) -> str:
+    by_reason = collections.defaultdict(list)
+    for uid, reason in skipped.items():
+        by_reason[reason].append(uid)
+
+    for limit in (40, 20, 10, 5, 0):
+        lines = [f"**{len(changed)}** member(s) {verb} league **{league_id}**" + (f": {mention_list(changed, limit)}" if changed else ".")]
+        lines += [f"Skipped ({reason}): {mention_list(uids, limit)}" for reason, uids in by_reason.items()]
+        if unknown:
+            lines.append("Not found: " + ", ".join([f"`{uid}`" for uid in unknown[:limit]] + ([f"and {len(unknown) - limit} more"] if len(unknown) > limit else [])))
+        if changed and not thread_channel:
+            lines.append("Warning: Thread not found.")
+        elif thread_failed:
+            lines.append(f"Warning: failed to update the coordination thread for {mention_list(thread_failed, limit)}.")
+        summary = "\n".join(lines)
+        if len(summary) <= MESSAGE_LENGTH_LIMIT:
+            break
+    return summary
+
+
+@app_commands.command(name="add-members", description="Add several members to your league at once")
+@app_commands.describe(
+    members="Mentions or IDs of the members to add",
+    role="Add every member with this role",
+    league_id="League ID (Optional if run in thread)"
+)
+async def add_members(interaction: discord.Interaction, members: str = None, role: discord.Role = None, league_id: str = None):
+    await defer(interaction, ephemeral=True)
+
+    if not is_league_host(interaction):
+        await interaction.followup.send("Only League Hosts can add members.", ephemeral=True)
+        return
+
+    league_id, league = await get_league_info(interaction, league_id)
+
+    if not league:
+        await interaction.followup.send("League not found. Please specify the `league_id` or run the command inside the league's private thread.", ephemeral=True)
+        return
+
+    if interaction.user.id != league["host"]:
+        await interaction.followup.send("You can only add members to the league you are hosting.", ephemeral=True)
+        return
+
+    candidates, unknown = await collect_members(interaction.guild, members, role)
+    if not candidates and not unknown:
+        await interaction.followup.send("Mention at least one member or pick a role.", ephemeral=True)
+        return
+
+    required_rank_id = league.get("rank_required_id", None)
+    skipped = {}
+    eligible = []
+    for member in candidates:
+        if member.bot:
+            skipped[member.id] = "bot account"
+        elif required_rank_id and required_rank_id != "None" and not is_player_eligible(member, required_rank_id):
+            skipped[member.id] = f"below {rank_store.get(required_rank_id, {}).get('name', 'N/A')}"
+        else:
+            eligible.append(member)
+
+    added = []
+    async with league_store.lock(league_id):
+        league = league_store.get(league_id)
+
+        if league:
+            for member in eligible:
+                if member.id in league["players"]:
+                    skipped[member.id] = "already in the league"
+                else:
+                    league["players"].append(member.id)
+                    added.append(member)
+            if added:
+                saved = league_store.put(league_id, league)
+
+    if not league:
+        await interaction.followup.send("This league no longer exists.", ephemeral=True)
+        return
+
+    thread_channel, results = None, {}
+    if added:
+        await saved
+        announcements.touch(league_id)
+        actions = {}
+        for member in added:
+            actions[f"add {member.id}"] = lambda thread, member=member: outbound.submit(("thread_members", thread.id), lambda: thread.add_user(member))
+            actions[f"notify {member.id}"] = lambda thread, member=member: send_join_notification(thread, member, league_id, is_host_add=True)
+        thread_channel, results = await with_thread(interaction.guild, league.get("thread_id"), **actions)
+
+    thread_failed = [member.id for member in added if isinstance(results.get(f"add {member.id}"), Exception)]
+    await interaction.followup.send(
+        roster_summary("added to", league_id, [member.id for member in added], skipped, unknown, thread_channel, thread_failed),
+        ephemeral=not added
+    )
+
+
+@app_commands.command(name="kick-members", description="Kick several members from your league at once")
+@app_commands.describe(
+    members="Mentions or IDs of the members to kick",
+    role="Kick every member with this role",
+    league_id="League ID (Optional if run in thread)"
+)
+async def kick_members(interaction: discord.Interaction, members: str = None, role: discord.Role = None, league_id: str = None):
+    await defer(interaction, ephemeral=True)
+
+    if not is_league_host(interaction):
+        await interaction.followup.send("Only League Hosts can kick members.", ephemeral=True)
+        return
+
+    league_id, league = await get_league_info(interaction, league_id)
+
+    if not league:
+        await interaction.followup.send("League not found. Please specify the `league_id` or run the command inside the league's private thread.", ephemeral=True)
+        return
+
+    if interaction.user.id != league["host"]:
+        await interaction.followup.send("You can only kick members from the league you are hosting.", ephemeral=True)
+        return
+
+    candidates, unknown = await collect_members(interaction.guild, members, role)
+    if not candidates and not unknown:
+        await interaction.followup.send("Mention at least one member or pick a role.", ephemeral=True)
+        return
+
+    skipped = {}
+    kicked = []
+    async with league_store.lock(league_id):
+        league = league_store.get(league_id)
+
+        if league:
+            for member in candidates:
+                if member.id == league["host"]:
+                    skipped[member.id] = "league host"
+                elif member.id not in league["players"]:
+                    skipped[member.id] = "not in the league"
+                else:
+                    league["players"].remove(member.id)
+                    kicked.append(member)
+            if kicked:
+                saved = league_store.put(league_id, league)
+
+    if not league:
+        await interaction.followup.send("This league no longer exists.", ephemeral=True)
+        return
+
+    thread_channel, results = None, {}
+    if kicked:
+        await saved
+        announcements.touch(league_id)
+        actions = {
+            f"remove {member.id}": lambda thread, member=member: outbound.submit(("thread_members", thread.id), lambda: thread.remove_user(member))
+            for member in kicked
+        }
+        actions["kick notice"] = lambda thread: outbound.submit(
+            ("messages", thread.id), lambda: thread.send(f"{mention_list([member.id for member in kicked])} {'was' if len(kicked) == 1 else 'were'} kicked from the league.")
+        )
+        thread_channel, results = await with_thread(interaction.guild, league.get("thread_id"), **actions)
+
+    thread_failed = [member.id for member in kicked if isinstance(results.get(f"remove {member.id}"), Exception)]
+    await interaction.followup.send(
+        roster_summary("kicked from", league_id, [member.id for member in kicked], skipped, unknown, thread_channel, thread_failed),
+        ephemeral=not kicked
+    )
+
+
+@app_commands.command(name="leave-league", description="Leave a league")
+@app_commands.describe(league_id="League ID (Optional if run in thread)")
+async def leave_league(interaction: discord.Interaction, league_id: str = None):
+    await defer(interaction, ephemeral=True)
+    
+    league_id, league = await get_league_info(interaction, league_id)
+
+    if not league:
+        await interaction.followup.send("League not found. Please specify the `league_id` or run the command inside the league's private thread.", ephemeral=True)
+        return
+
+    if interaction.user.id == league['host']:
+        await interaction.followup.send("As the host, you cannot manually leave. Please use /end-league to close the league.", ephemeral=True)
+        return
+
+    async with league_store.lock(league_id):
+        league = league_store.get(league_id)
+        error = None
+
+        if not league:
+            error = "This league no longer exists."
+        elif interaction.user.id not in league["players"]:
+            error = "You are not part of this league."
+        else:
+            league["players"].remove(interaction.user.id)
+            saved = league_store.put(league_id, league)
+
+    if error:
+        await interaction.followup.send(error, ephemeral=True)
+        return
+
+    await saved
+    announcements.touch(league_id)
+
+    thread_channel, results = await with_thread(
+        interaction.guild, league.get("thread_id"),
+        remove_user=lambda thread: outbound.submit(("thread_members", thread.id), lambda: thread.remove_user(interaction.user)),
+        leave_notice=lambda thread: outbound.submit(("messages", thread.id), lambda: thread.send(f"{interaction.user.mention} has left the league.")),
+    )
+
+    if thread_channel:
+        if not any(isinstance(result, Exception) for result in results.values()):
+            await interaction.followup.send(f"You have left league **{league_id}** and been removed from the thread.", ephemeral=False)
+        else:
+            await interaction.followup.send(f"Warning: You have left league **{league_id}**, but failed to remove you from the thread.", ephemeral=False)
+    else:
+        await interaction.followup.send(f"You have left league **{league_id}**. Warning: Thread not found.", ephemeral=False)
+
+
+@app_commands.command(name="status", description="Get status of a league")
+@app_commands.describe(league_id="League ID (Optional if run in thread)")
+async def status(interaction: discord.Interaction, league_id: str = None):
+    await defer(interaction)
+    
+    league_id, league = await get_league_info(interaction, league_id)
+
+    if not league:
+        await interaction.followup.send("League not found. Please specify the `league_id` or run the command inside the league's private thread.", ephemeral=True)
+        return
+
+    players_required = get_players_required(league['match_type'])
+        
+    required_rank_id = league.get("rank_required_id")
+    rank_restriction_text = "None (Open)"
+    if required_rank_id and required_rank_id != "None":
+        rank_restriction_text = rank_store.get(required_rank_id, {}).get('name', f'Role ID: {required_rank_id}')
+
+    members = [f"<@{m}>" for m in league["players"]]
+    embed = discord.Embed(
+        title=f"League **{league_id}** Status",
+        description=f"**{len(members)}** / **{players_required}** players joined.",
+        color=THEME_COLOR
+    )
+    embed.add_field(name="Host", value=f"<@{league['host']}>", inline=False)
+    embed.add_field(name="Players", value=", ".join(members) if members else "No players yet", inline=False)
+    embed.add_field(name="Game Mode", value=league["game_mode"], inline=True)
+    embed.add_field(name="Match Type", value=league["match_type"], inline=True)
+    embed.add_field(name="Perks", value=league["perks"], inline=True)
+    embed.add_field(name="Min Rank Required", value=rank_restriction_text, inline=True)
+    if league["private_link"]:
+        embed.add_field(name="Private Server Link", value=league["private_link"], inline=False)
+    
+    await interaction.followup.send(embed=embed)
+
+
+@app_commands.command(name="randomize-teams", description="Randomly split joined players into two teams (2v2, 3v3, 4v4 only)")
+@app_commands.describe(
+    league_id="League ID (Optional if run in thread)",
+    mode="Random shuffle, or Balanced teams using each player's rank level."
+)
+@app_commands.choices(mode=[
+    app_commands.Choice(name="Random", value="random"),
+    app_commands.Choice(name="Balanced", value="balanced"),
+])
+async def randomize_teams(interaction: discord.Interaction, league_id: str = None, mode: str = "random"):
+    await defer(interaction)
+
+    if not is_league_host(interaction):
+        await interaction.followup.send("Only League Hosts can randomize teams.", ephemeral=True)
+        return
+        
+    league_id, league = await get_league_info(interaction, league_id)
+
+    if not league:
+        await interaction.followup.send("League not found. Please specify the `league_id` or run the command inside the league's private thread.", ephemeral=True)
+        return
+        
+    if interaction.user.id != league["host"]:
+        await interaction.followup.send("You can only randomize teams for the league you are hosting.", ephemeral=True)
+        return
+
+    match_type = league.get("match_type")
+    
+    if match_type == "1v1":
+        await interaction.followup.send("Team randomization is not available for 1v1 leagues.", ephemeral=True)
+        return
+    
+    try:
+        team_size = int(match_type.split('v')[0])
+        players_required = team_size * 2
+    except (IndexError, ValueError):
+        await interaction.followup.send(f"Could not determine team size from match type: `{match_type}`.", ephemeral=True)
+        return
+
+    all_players = league["players"].copy()
+    
+    if len(all_players) < players_required:
+        await interaction.followup.send(f"Cannot randomize: You need {players_required} players to start, but only have {len(all_players)}.", ephemeral=True)
+        return
+    
+    if mode == "balanced":
+        substitutes = all_players[players_required:]
+        pool = []
+        for uid in all_players[:players_required]:
+            member = interaction.guild.get_member(uid)
+            pool.append((uid, get_member_highest_rank_level(member) if member else 0))
+        team_a, team_b = balance_teams(pool, team_size)
+        level_a, level_b = sum(level for _, level in team_a), sum(level for _, level in team_b)
+        team_a, team_b = [uid for uid, _ in team_a], [uid for uid, _ in team_b]
+        title = "Teams Balanced!"
+        team_a_name, team_b_name = f"Team 1 (Level {level_a})", f"Team 2 (Level {level_b})"
+    else:
+        random.shuffle(all_players)
+        team_a = all_players[:team_size]
+        team_b = all_players[team_size:players_required]
+        substitutes = all_players[players_required:]
+        title = "Teams Randomized!"
+        team_a_name, team_b_name = "Team 1", "Team 2"
+    
+    team_a_mentions = [f"<@{uid}>" for uid in team_a]
+    team_b_mentions = [f"<@{uid}>" for uid in team_b]
+    
+    embed = discord.Embed(
+        title=title,
+        description=f"Match Type: **{match_type}** | Players Used: **{players_required}**",
+        color=THEME_COLOR
+    )
+    embed.add_field(name=team_a_name, value="\n".join(team_a_mentions), inline=True)
+    embed.add_field(name=team_b_name, value="\n".join(team_b_mentions), inline=True)
+    if substitutes:
+        embed.add_field(name="Substitutes", value="\n".join(f"<@{uid}>" for uid in substitutes), inline=False)
+    
+    thread_channel = await resolve_thread(interaction.guild, league.get("thread_id"))
+    
+    if thread_channel:
+        await thread_channel.send(f"Randomized teams ready! Host: {interaction.user.mention}", embed=embed)
+        await interaction.followup.send(f"Teams randomized and sent to the private thread: {thread_channel.mention}", ephemeral=True)
+    else:
+        await interaction.followup.send(f"Teams randomized. Please check the results below, as the private thread could not be found.", embed=embed, ephemeral=False)
+
+
+@app_commands.command(name="end-league", description="End a league and clean up")
+@app_commands.describe(league_id="League ID (Optional if run in thread)")
+async def end_league(interaction: discord.Interaction, league_id: str = None):
+    await defer(interaction)
+    
+    league_id, league = await get_league_info(interaction, league_id)
+
+    if not league:
+        await interaction.followup.send("League not found. Please specify the `league_id` or run the command inside the league's private thread.", ephemeral=True)
+        return
+
+    if interaction.user.id != league["host"] and not is_staff(interaction):
+        await interaction.followup.send("You must be the league host or staff to end this league.", ephemeral=True)
+        return
+
+    async with league_store.lock(league_id):
+        league = league_store.get(league_id)
+        if league:
+            created_at, _ = league_store.timestamps[league_id]
+            deleted = league_store.delete(league_id)
+            announcements.forget(league_id)
+            recorded = league_history.record(league_id, league, created_at, interaction.user.id)
+
+    if not league:
+        await interaction.followup.send("This league has already ended.", ephemeral=True)
+        return
+
+    await asyncio.gather(deleted, recorded)
+    
+    channel = bot.get_channel(league.get("announcement_channel_id"))
+    msg_id = league.get("announcement_msg_id")
+    cleanup = {
+        "thread deletion": with_thread(interaction.guild, league.get("thread_id"), thread_delete=lambda thread: thread.delete()),
+    }
+
+    if channel and msg_id:
+        ended_embed = discord.Embed(
+            title=f"Kada League Has Ended",
+            description=f"This league, hosted by <@{league['host']}>, has ended. Check has results in <#1442196085601861632>.",
+            color=THEME_COLOR
+        )
+        ended_embed.set_footer(text=f"ID: {league_id} | Ended by {interaction.user.display_name}")
+        cleanup["join button removal"] = channel.get_partial_message(msg_id).edit(view=None)
+        cleanup["end announcement"] = channel.send(embed=ended_embed)
+
+    results = await gather_calls(**cleanup)
+
+    button_error = results.get("join button removal")
+    if isinstance(button_error, discord.NotFound):
+        print(f"Announcement message {msg_id} not found.")
+    elif isinstance(button_error, Exception):
+        await interaction.followup.send(f"Warning: League ended, but failed to disable the join button. Error: `{button_error}`", ephemeral=True)
+
+    embed = discord.Embed(
+        title=f"League {league_id} Ended",
+        description="This league has officially ended, the join button has been disabled, and the private thread was deleted.",
+        color=THEME_COLOR
+    )
+    await interaction.followup.send(embed=embed)
+
+
+@app_commands.command(name="queue", description="Queue for a league; one is created as soon as enough players of your rank band queue.")
+@app_commands.describe(region="Region to play in", game_mode="Game mode", match_type="Match type")
+@app_commands.choices(
+    region=[app_commands.Choice(name=choice, value=choice) for choice in REGION_CHOICES],
+    game_mode=[app_commands.Choice(name=choice, value=choice) for choice in GAMEMODE_CHOICES],
+    match_type=[app_commands.Choice(name=choice, value=choice) for choice in MATCHTYPE_CHOICES],
+)
+async def queue(interaction: discord.Interaction, region: str, game_mode: str, match_type: str):
+    await defer(interaction, ephemeral=True)
+
+    previous = matchmaking.dequeue(interaction.user.id)
+    key = matchmaking.bucket_key(interaction.guild.id, region, game_mode, match_type, get_member_highest_rank_level(interaction.user))
+    group = matchmaking.enqueue(interaction.user.id, key)
+
+    if group is None:
+        moved = " (your previous queue entry was replaced)" if previous and previous != key else ""
+        await interaction.followup.send(
+            f"You are queued for **{region} {game_mode} {match_type}**{moved}. "
+            f"**{matchmaking.waiting(key)}** / **{get_players_required(match_type)}** players waiting in your rank band.",
+            view=QueueTicketView(interaction.user.id),
+            ephemeral=True
+        )
+        return
+
+    formed = await form_queued_league(interaction.guild, key, group)
+    if formed is None:
+        await interaction.followup.send("A match was found but the league could not be created. You are still in the queue.", ephemeral=True)
+        return
+
+    league_id, thread = formed
+    await interaction.followup.send(f"Match found! League **{league_id}** was created: {thread.mention}", ephemeral=True)
+
+
+@app_commands.command(name="leave-queue", description="Leave the matchmaking queue")
+async def leave_queue(interaction: discord.Interaction):
+    if matchmaking.dequeue(interaction.user.id) is None:
+        await interaction.response.send_message("You are not in the matchmaking queue.", ephemeral=True)
+    else:
+        await interaction.response.send_message("You left the matchmaking queue.", ephemeral=True)
+
+
+def league_choice(league_id: str, league: dict) -> app_commands.Choice[str]:
+    players_required = get_players_required(league.get("match_type"))
+    label = f"{league_id} | {league.get('match_type')} {league.get('game_mode')} | {len(league['players'])}/{players_required} players"
+    return app_commands.Choice(name=label[:100], value=league_id)
+
+@instrumented("league-id-autocomplete")
+async def league_id_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
+    prefix = normalize_league_id(current)
+    own = league_store.hosted_by(interaction.user.id) | league_store.joined_by(interaction.user.id)
+    matches = sorted(league_id for league_id in own if league_id.startswith(prefix))
+
+    if len(matches) < 25 and prefix and is_staff(interaction):
+        matches += [league_id for league_id in league_store.find_by_prefix(prefix) if league_id not in own]
+
+    return [league_choice(league_id, league_store.get(league_id)) for league_id in matches[:25] if league_store.get(league_id)]
+
+for league_command in (add_member, kick_member, add_members, kick_members, leave_league, status, randomize_teams, end_league):
+    league_command.autocomplete("league_id")(league_id_autocomplete)
+
+class HistoryPager(discord.ui.View):
+    def __init__(self, owner_id: int, title: str, host_id: int | None = None, player_id: int | None = None):
+        super().__init__(timeout=300)
+        self.owner_id = owner_id
+        self.title = title
+        self.host_id = host_id
+        self.player_id = player_id
+        self.cursors = [None]
+        self.next_cursor = None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("Run `/league-history` yourself to browse the history.", ephemeral=True)
+            return False
+        return True
+
+    async def render(self) -> discord.Embed:
+        rows, has_more = await league_history.page(self.host_id, self.player_id, self.cursors[-1])
+        self.next_cursor = rows[-1][1] if has_more else None
+        self.previous_page.disabled = len(self.cursors) == 1
+        self.next_page.disabled = self.next_cursor is None
+
+        embed = discord.Embed(title=self.title, color=THEME_COLOR)
+        if not rows:
+            embed.description = "No ended leagues found."
+        else:
+            embed.description = "\n".join(
+                f"**{league_id}** | {match_type} {game_mode} | Host <@{host_id}> | {player_count} players | Ended <t:{int(ended_at)}:R>"
+                for league_id, ended_at, created_at, host_id, match_type, game_mode, player_count in rows
+            )
+        embed.set_footer(text=f"Page {len(self.cursors)}")
+        return embed
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.grey)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if len(self.cursors) > 1:
+            self.cursors.pop()
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.grey)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.next_cursor is not None:
+            self.cursors.append(self.next_cursor)
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
+@app_commands.command(name="league-history", description="Browse ended leagues, optionally filtered by host or player.")
+@app_commands.describe(
+    host="Only show leagues hosted by this member.",
+    player="Only show leagues this member played in."
+)
+async def league_history_command(interaction: discord.Interaction, host: discord.Member = None, player: discord.Member = None):
+    await defer(interaction, ephemeral=True)
+
+    title = "League History"
+    if host:
+        title += f" | Hosted by {host.display_name}"
+    if player:
+        title += f" | Played by {player.display_name}"
+
+    pager = HistoryPager(interaction.user.id, title, host.id if host else None, player.id if player else None)
+    await interaction.followup.send(embed=await pager.render(), view=pager, ephemeral=True)
+
+
+@app_commands.command(name="host-stats", description="Show how many leagues a host has run recently.")
+@app_commands.describe(
+    host="The host to look up (defaults to you).",
+    days="How many days to look back (default 30)."
+)
+async def host_stats(interaction: discord.Interaction, host: discord.Member = None, days: app_commands.Range[int, 1, 365] = 30):
+    await defer(interaction, ephemeral=True)
+    host = host or interaction.user
+
+    since = time.time() - days * 86400
+    count, players, duration, by_match_type = await league_history.host_stats(host.id, since)
+
+    embed = discord.Embed(
+        title=f"Host Stats for {host.display_name}",
+        description=f"**{count}** leagues hosted in the last **{days}** days.",
+        color=THEME_COLOR
+    )
+    if count:
+        embed.add_field(name="Players", value=f"{players} total, {players / count:.1f} per league", inline=True)
+        if duration is not None:
+            embed.add_field(name="Average Duration", value=f"{duration / 60:.0f} minutes", inline=True)
+        embed.add_field(name="Match Types", value="\n".join(f"{match_type or 'Unknown'}: {total}" for match_type, total in by_match_type), inline=False)
+
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
+async def setup(bot: commands.Bot):
+    with startup_profile.measure(__name__, "setup"):
+        for command in (host_league, add_member, kick_member, add_members, kick_members, leave_league, status, randomize_teams, end_league, queue, leave_queue, league_history_command, host_stats):
+            bot.tree.add_command(command, override=True)
+        for listener in (on_raw_thread_delete, on_raw_message_delete, on_raw_member_remove):
+            bot.add_listener(listener)
@@ -0,0 +1,92 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import time
+
+from core import *
+
+@app_commands.command(name="warn", description="Issue a strike to a host user and track their warnings.")
+@app_commands.describe(
+    target="The host user to receive the strike.", 
+    reason="The reason for the strike."
+)
+async def warn_user(interaction: discord.Interaction, target: discord.Member, reason: str):
+    await defer(interaction)
+    
+    if not is_staff(interaction):
+        await interaction.followup.send("Only staff can use the warning system.", ephemeral=True)
+        return
+    
+    async with strike_store.lock(target.id):
+        strikes = strike_store.active(target.id)
+        expires_at = time.time() + STRIKE_EXPIRY_DAYS * 86400
+        strikes.append(expires_at)
+        saved = strike_store.put(target.id, {"expires": strikes})
+    await saved
+    strike_expiry.schedule(target.id, expires_at)
+    current_warn_count = len(strikes)
+    
+    host_role = interaction.guild.get_role(LEAGUE_HOST_ROLE_ID)
+    strike_role_to_add = interaction.guild.get_role(get_strike_role_id(current_warn_count))
+    action_log = ""
+    
+    if current_warn_count >= 3:
+        if host_role in target.roles:
+            action_log = f"**{target.mention}'s Host Role was REVOKED.** (Strike {current_warn_count} reached)."
+            failed_log = f"**Host Role REVOKE FAILED** for {target.mention} (Bot lacks permissions)."
+        else:
+            action_log = f"**{target.mention}'s Host Strike {current_warn_count} recorded.** (No Host role to revoke)."
+            failed_log = f"**Strike role removal FAILED** for {target.mention} (Bot lacks permissions)."
+        edit_reason = f"Maximum strikes reached ({current_warn_count}). Host role revoked."
+    elif strike_role_to_add:
+        if strike_role_to_add not in target.roles:
+            action_log = f"**Assigned role: {strike_role_to_add.name}** to {target.mention}."
+        else:
+            action_log = f"**{target.mention} already has {strike_role_to_add.name}.**"
+        failed_log = f"**Role ADDITION FAILED** for {target.mention} (Bot lacks permissions)."
+        edit_reason = f"Strike {current_warn_count} issued by {interaction.user.name}."
+
+    if action_log:
+        new_roles = strike_roles_for(target, current_warn_count, revoke_host=current_warn_count >= 3)
+        if {role.id for role in new_roles} != {role.id for role in target.roles if role.id != interaction.guild.id}:
+            try:
+                await target.edit(roles=new_roles, reason=edit_reason)
+            except discord.Forbidden:
+                action_log = failed_log
+
+    log_channel = bot.get_channel(WARN_LOG_CHANNEL_ID)
+    log_status = ""
+    
+    log_embed = discord.Embed(
+        title=f"Strike Issued: #{current_warn_count}",
+        color=THEME_COLOR,
+        timestamp=interaction.created_at
+    )
+    log_embed.add_field(name="Target", value=target.mention, inline=True)
+    log_embed.add_field(name="Total Strikes", value=str(current_warn_count), inline=True)
+    log_embed.add_field(name="Staff Member", value=interaction.user.mention, inline=True)
+    log_embed.add_field(name="Reason", value=reason, inline=False)
+    log_embed.add_field(name="Strike Expires", value=f"<t:{int(expires_at)}:R>", inline=True)
+    log_embed.add_field(name="Action", value=action_log if action_log else "Warning logged, no role action.", inline=False)
+    log_embed.set_footer(text=f"Target ID: {target.id}")
+
+    if log_channel:
+        try:
+            await log_channel.send(embed=log_embed)
+            log_status = f"Warning logged to {log_channel.mention}."
+        except discord.Forbidden:
+            log_status = "Warning could NOT be logged (Missing permissions in log channel)."
+        except Exception:
+            log_status = "Warning could NOT be logged (Log channel error)."
+    else:
+        log_status = f"Warning Log Channel (ID: `{WARN_LOG_CHANNEL_ID}`) not found."
+    
+    await interaction.followup.send(
+        f"**Strike #{current_warn_count}** issued to **{target.mention}** for: **{reason}**." 
+        f"\n{action_log}\n\n*{log_status}*", 
+        ephemeral=False
+    )
+
+async def setup(bot: commands.Bot):
+    with startup_profile.measure(__name__, "setup"):
+        bot.tree.add_command(warn_user, override=True)
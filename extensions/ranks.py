@@ -0,0 +1,12 @@
+import discord
+from discord.ext import commands
+
+from core import *
+
+async def on_member_update(before: discord.Member, after: discord.Member):
+    if before.roles != after.roles:
+        rank_store.invalidate(after)
+
+async def setup(bot: commands.Bot):
+    with startup_profile.measure(__name__, "setup"):
+        bot.add_listener(on_member_update)